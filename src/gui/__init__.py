@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+__copyright__ = '(C) 2026 by Gabriel De Luca'
+__email__ = 'caprieldeluca@gmail.com'
+__license__ = 'GPL version 3'
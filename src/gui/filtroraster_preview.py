@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : filtroraster_preview.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import math
+import os
+import shutil
+import tempfile
+
+from qgis.core import (
+    QgsCoordinateTransform,
+    QgsMapLayerProxyModel,
+    QgsPalettedRasterRenderer,
+    QgsProject,
+    QgsRasterLayer
+)
+from qgis.gui import (
+    QgsDockWidget,
+    QgsMapLayerComboBox
+)
+from qgis.PyQt.QtCore import (
+    QCoreApplication,
+    QTimer
+)
+from qgis.PyQt.QtGui import QColor
+from qgis.PyQt.QtWidgets import (
+    QCheckBox,
+    QFormLayout,
+    QLabel,
+    QLineEdit,
+    QSpinBox,
+    QWidget
+)
+
+from osgeo import gdal
+
+from otbn.processing.algorithms.otbn_utils import (
+    filter_chain,
+    raster_tiles
+)
+
+
+class FiltroRasterPreview(QgsDockWidget):
+    """Live preview of the Filtro Raster on the map canvas extent.
+
+    The classification is read for the visible extent only, decimated
+    by the chosen factor, and filtered into a temporary layer. The
+    neighbour counts of the visible window are kept, so changing the
+    percentages or flags only reruns the thresholds and the smoothing.
+    With a decimation above 1 the kernels span decimated pixels, so
+    the preview approximates the full-resolution result. The decimation
+    is raised as needed so the window is not finer than the canvas and
+    has at most MAX_PIXELS.
+    """
+
+    # Maximum pixels of the decimated window read on the GUI thread
+    MAX_PIXELS = 4 * 1024 * 1024
+
+    def __init__(self, iface, parent=None):
+        super().__init__(self.tr('Vista previa del Filtro Raster'), parent)
+        self.iface = iface
+        self.canvas = iface.mapCanvas()
+        self.layer_id = None
+        self._counts_key = None
+        self._counts = None
+        self._paths = []
+        self._tmp_dir = tempfile.mkdtemp(prefix='otbn_vista_previa_')
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(300)
+        self._timer.timeout.connect(self.refresh)
+
+        widget = QWidget()
+        layout = QFormLayout(widget)
+
+        self.active_check = QCheckBox()
+        layout.addRow(self.tr('Activar'), self.active_check)
+
+        self.input_combo = QgsMapLayerComboBox()
+        self.input_combo.setFilters(QgsMapLayerProxyModel.RasterLayer)
+        layout.addRow(self.tr('Raster de clasificación'), self.input_combo)
+
+        self.clases_edit = QLineEdit()
+        layout.addRow(self.tr('Clase(s) a extraer'), self.clases_edit)
+
+        self.percent_spins = []
+        for r in range(2, 6):
+            spin = QSpinBox()
+            spin.setRange(0, 100)
+            spin.setValue(50)
+            layout.addRow(self.tr('Porcentaje de cobertura para Radio {}').format(r), spin)
+            self.percent_spins.append(spin)
+
+        self.m11_check = QCheckBox()
+        self.m11_check.setChecked(True)
+        layout.addRow(self.tr('Suavizado final'), self.m11_check)
+
+        self.mady_check = QCheckBox()
+        self.mady_check.setChecked(True)
+        layout.addRow(self.tr('Absorber pixeles adyacentes'), self.mady_check)
+
+        self.decimation_spin = QSpinBox()
+        self.decimation_spin.setRange(1, 64)
+        self.decimation_spin.setValue(1)
+        layout.addRow(self.tr('Decimación (1 = resolución completa)'), self.decimation_spin)
+
+        self.status_label = QLabel()
+        self.status_label.setWordWrap(True)
+        layout.addRow(self.status_label)
+
+        self.setWidget(widget)
+
+        # Cualquier cambio reprograma la actualización
+        self.active_check.toggled.connect(self._schedule)
+        self.input_combo.layerChanged.connect(self._schedule)
+        self.clases_edit.textChanged.connect(self._schedule)
+        for spin in self.percent_spins:
+            spin.valueChanged.connect(self._schedule)
+        self.m11_check.toggled.connect(self._schedule)
+        self.mady_check.toggled.connect(self._schedule)
+        self.decimation_spin.valueChanged.connect(self._schedule)
+        self.canvas.extentsChanged.connect(self._schedule)
+
+    def tr(self, string):
+        """Return a localized string."""
+        return QCoreApplication.translate('Otbn', string)
+
+    def _schedule(self, *args):
+        """Refresh once the parameters stop changing."""
+        if self.active_check.isChecked():
+            self._timer.start()
+
+    def _extent(self, layer):
+        """Return the canvas extent in the CRS of layer."""
+
+        transform = QgsCoordinateTransform(
+            self.canvas.mapSettings().destinationCrs(),
+            layer.crs(),
+            QgsProject.instance())
+        return transform.transformBoundingBox(self.canvas.extent())
+
+    def _min_decimation(self, dataset, extent):
+        """Return the smallest decimation worth reading for extent.
+
+        Raster pixels finer than the canvas pixels are not seen, and the
+        window is kept within MAX_PIXELS.
+        """
+
+        gt = dataset.GetGeoTransform()
+        pixel_size = abs(gt[1])
+
+        # Map units per canvas pixel, in the CRS of the raster
+        units_per_pixel = (
+            self.canvas.mapUnitsPerPixel()
+            * extent.width() / self.canvas.extent().width())
+        screen = math.floor(units_per_pixel / pixel_size)
+
+        width = min(extent.width() / pixel_size, dataset.RasterXSize)
+        height = min(extent.height() / abs(gt[5]), dataset.RasterYSize)
+        cap = math.ceil(math.sqrt(width * height / self.MAX_PIXELS))
+
+        return max(1, screen, cap)
+
+    def _window(self, dataset, extent, decimation):
+        """Return the extent as a Tile on the decimated grid, or None."""
+
+        gt = dataset.GetGeoTransform()
+
+        # Pixel window of the extent, on the grid decimated from the origin;
+        # only whole decimated pixels, so every read keeps the ratio
+        size = gt[1] * decimation, gt[5] * decimation
+        xsize = dataset.RasterXSize // decimation
+        ysize = dataset.RasterYSize // decimation
+        x0 = max(0, math.floor((extent.xMinimum() - gt[0]) / size[0]))
+        x1 = min(xsize, math.ceil((extent.xMaximum() - gt[0]) / size[0]))
+        y0 = max(0, math.floor((extent.yMaximum() - gt[3]) / size[1]))
+        y1 = min(ysize, math.ceil((extent.yMinimum() - gt[3]) / size[1]))
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        halo = filter_chain.HALO
+        rx0 = max(0, x0 - halo)
+        ry0 = max(0, y0 - halo)
+        rx1 = min(xsize, x1 + halo)
+        ry1 = min(ysize, y1 + halo)
+
+        return raster_tiles.Tile(
+            x0, y0, x1 - x0, y1 - y0,
+            rx0, ry0, rx1 - rx0, ry1 - ry0)
+
+    def _read(self, dataset, tile, decimation):
+        """Read the window of tile from band 1, decimated.
+
+        The decimated grid holds whole pixels only (see _window), so the
+        source window is never clipped and GDAL resamples it by exactly
+        decimation, as the geotransform written by _show assumes.
+        """
+
+        return dataset.GetRasterBand(1).ReadAsArray(
+            tile.read_xoff * decimation,
+            tile.read_yoff * decimation,
+            tile.read_xsize * decimation,
+            tile.read_ysize * decimation,
+            buf_xsize=tile.read_xsize,
+            buf_ysize=tile.read_ysize)
+
+    def refresh(self):
+        """Filter the visible extent and update the preview layer."""
+
+        layer = self.input_combo.currentLayer()
+        if not self.active_check.isChecked() or layer is None:
+            return
+
+        try:
+            clases = [int(clase) for clase in self.clases_edit.text().split(',')]
+        except ValueError:
+            self.status_label.setText(self.tr('Clase(s) no válidas.'))
+            return
+
+        dataset = gdal.Open(layer.source())
+        if dataset is None:
+            self.status_label.setText(self.tr('El raster no se puede leer con GDAL.'))
+            return
+        extent = self._extent(layer)
+        decimation = max(
+            self.decimation_spin.value(),
+            self._min_decimation(dataset, extent))
+        tile = self._window(dataset, extent, decimation)
+        if tile is None:
+            self.status_label.setText(self.tr('El raster no está en la extensión visible.'))
+            return
+
+        # Los conteos dependen del raster, las clases y la ventana
+        key = (layer.source(), tuple(clases), tile, decimation)
+        if key != self._counts_key:
+            R = self._read(dataset, tile, decimation)
+            self._counts = filter_chain.counts(R, clases, 'spans')
+            self._counts_key = key
+
+        M1p, Mx = self._counts
+        M11 = filter_chain.from_counts(
+            M1p,
+            Mx,
+            tuple(spin.value() for spin in self.percent_spins),
+            self.m11_check.isChecked(),
+            self.mady_check.isChecked())[tile.inner]
+
+        self._show(dataset, tile, decimation, M11)
+        self.status_label.setText(
+            self.tr('{} x {} pixeles, decimación {}.').format(
+                tile.xsize, tile.ysize, decimation))
+
+    def _show(self, dataset, tile, decimation, M11):
+        """Write M11 to a new temporary file and point the preview layer to it."""
+
+        gt = dataset.GetGeoTransform()
+        fd, path = tempfile.mkstemp(suffix='.tif', dir=self._tmp_dir)
+        os.close(fd)
+        dst_ds = gdal.GetDriverByName('GTiff').Create(
+            path, tile.xsize, tile.ysize, 1, gdal.GDT_Byte)
+        dst_ds.SetGeoTransform((
+            gt[0] + tile.xoff * decimation * gt[1],
+            gt[1] * decimation,
+            0,
+            gt[3] + tile.yoff * decimation * gt[5],
+            0,
+            gt[5] * decimation))
+        dst_ds.SetProjection(dataset.GetProjection())
+        dst_ds.GetRasterBand(1).WriteArray(M11.view('uint8'))
+        dst_ds = None
+
+        name = self.tr('Vista previa Filtro Raster')
+        layer = QgsProject.instance().mapLayer(self.layer_id) if self.layer_id else None
+        if layer is None:
+            layer = QgsRasterLayer(path, name, 'gdal')
+            QgsProject.instance().addMapLayer(layer)
+            self.layer_id = layer.id()
+        else:
+            layer.setDataSource(path, name, 'gdal')
+
+        layer.setRenderer(QgsPalettedRasterRenderer(
+            layer.dataProvider(),
+            1,
+            [QgsPalettedRasterRenderer.Class(1, QColor(0, 160, 0), self.tr('Filtrado'))]))
+        layer.triggerRepaint()
+
+        # Borrar los archivos de vistas previas anteriores
+        self._paths.append(path)
+        for old_path in self._paths[:-1]:
+            try:
+                os.remove(old_path)
+                self._paths.remove(old_path)
+            except OSError:
+                pass
+
+    def cleanup(self):
+        """Remove the preview layer and disconnect from the canvas."""
+
+        self._timer.stop()
+        self.canvas.extentsChanged.disconnect(self._schedule)
+        if self.layer_id and QgsProject.instance().mapLayer(self.layer_id):
+            QgsProject.instance().removeMapLayer(self.layer_id)
+        self.layer_id = None
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
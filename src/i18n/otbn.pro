@@ -1,9 +1,12 @@
 SOURCES = ../otbn_plugin.py \
+ ../gui/filtroraster_preview.py \
  ../processing/otbn_provider.py \
  ../processing/algorithms/coberturas_algorithm.py \
  ../processing/algorithms/desagrupar_algorithm.py \
  ../processing/algorithms/diferencias_algorithm.py \
  ../processing/algorithms/filtroraster_algorithm.py \
+ ../processing/algorithms/filtrorasterbarrido_algorithm.py \
+ ../processing/algorithms/filtrorasterlote_algorithm.py \
  ../processing/algorithms/muestras_algorithm.py \
  ../processing/algorithms/numerados_algorithm.py \
  ../processing/algorithms/poligonizar_algorithm.py \
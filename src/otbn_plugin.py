@@ -17,10 +17,13 @@ import os
 
 from qgis import processing
 from qgis.core import QgsApplication, QgsSettings
-from qgis.PyQt.QtCore import QCoreApplication, QLocale, QTranslator
+from qgis.PyQt.QtCore import QCoreApplication, QLocale, Qt, QTranslator
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction, QMenu
 
+from otbn.gui.filtroraster_preview import (
+    FiltroRasterPreview
+)
 from otbn.processing.otbn_provider import (
     OtbnProvider
 )
@@ -48,6 +51,7 @@ class OtbnPlugin:
         self.provider = None
         self.snaps_action = None
         self.menu = None
+        self.preview_dock = None
 
     def tr(self, string):
         """Return a localized string."""
@@ -73,6 +77,33 @@ class OtbnPlugin:
             self.run_filtroraster
         )
 
+        # Filtro raster, barrido de umbrales
+        self.filtrorasterbarrido_action = QAction(
+            self.tr('01 - Filtro Raster (&barrido de umbrales)'),
+            self.iface.mainWindow()
+        )
+        self.filtrorasterbarrido_action.triggered.connect(
+            self.run_filtrorasterbarrido
+        )
+
+        # Filtro raster, lote de clases y bandas
+        self.filtrorasterlote_action = QAction(
+            self.tr('01 - Filtro Raster (&lote de clases y bandas)'),
+            self.iface.mainWindow()
+        )
+        self.filtrorasterlote_action.triggered.connect(
+            self.run_filtrorasterlote
+        )
+
+        # Vista previa del filtro raster
+        self.filtrorasterpreview_action = QAction(
+            self.tr('01 - &Vista previa del Filtro Raster'),
+            self.iface.mainWindow()
+        )
+        self.filtrorasterpreview_action.triggered.connect(
+            self.run_filtrorasterpreview
+        )
+
         # Poligonizar
         self.poligonizar_action = QAction(
             self.tr('02 - &Poligonizar'),
@@ -125,6 +156,15 @@ class OtbnPlugin:
         self.menu.addActions([
             self.filtroraster_action
         ])
+        self.menu.addActions([
+            self.filtrorasterbarrido_action
+        ])
+        self.menu.addActions([
+            self.filtrorasterlote_action
+        ])
+        self.menu.addActions([
+            self.filtrorasterpreview_action
+        ])
         self.menu.addActions([
             self.poligonizar_action
         ])
@@ -154,6 +194,23 @@ class OtbnPlugin:
             self.tr('&OTBN'),
             self.filtroraster_action
         )
+        self.iface.removePluginMenu(
+            self.tr('&OTBN'),
+            self.filtrorasterbarrido_action
+        )
+        self.iface.removePluginMenu(
+            self.tr('&OTBN'),
+            self.filtrorasterlote_action
+        )
+        self.iface.removePluginMenu(
+            self.tr('&OTBN'),
+            self.filtrorasterpreview_action
+        )
+        if self.preview_dock is not None:
+            self.preview_dock.cleanup()
+            self.iface.removeDockWidget(self.preview_dock)
+            self.preview_dock.deleteLater()
+            self.preview_dock = None
         self.iface.removePluginMenu(
             self.tr('&OTBN'),
             self.poligonizar_action
@@ -180,6 +237,28 @@ class OtbnPlugin:
         """Open the Filtro Raster algorithm dialog."""
         processing.execAlgorithmDialog('otbn:filtroraster')
 
+    def run_filtrorasterbarrido(self):
+        """Open the Filtro Raster barrido algorithm dialog."""
+        processing.execAlgorithmDialog('otbn:filtrorasterbarrido')
+
+    def run_filtrorasterlote(self):
+        """Open the Filtro Raster lote algorithm dialog."""
+        processing.execAlgorithmDialog('otbn:filtrorasterlote')
+
+    def run_filtrorasterpreview(self):
+        """Open the Filtro Raster preview dock."""
+        if self.preview_dock is None:
+            self.preview_dock = FiltroRasterPreview(
+                self.iface,
+                self.iface.mainWindow()
+            )
+            self.iface.addDockWidget(
+                Qt.RightDockWidgetArea,
+                self.preview_dock
+            )
+        self.preview_dock.show()
+        self.preview_dock.raise_()
+
     def run_poligonizar(self):
         """Open the Poligonizar algorithm dialog."""
         processing.execAlgorithmDialog('otbn:poligonizar')
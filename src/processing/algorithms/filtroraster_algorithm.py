@@ -18,12 +18,17 @@ import os
 from qgis.core import (
     QgsProcessing,
     QgsProcessingAlgorithm,
+    QgsProcessingException,
     QgsProcessingParameterBoolean,
     QgsProcessingParameterDefinition,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFile,
+    QgsProcessingParameterMultipleLayers,
     QgsProcessingParameterNumber,
     QgsProcessingParameterRasterDestination,
     QgsProcessingParameterRasterLayer,
     QgsProcessingParameterString,
+    QgsProcessingUtils,
     QgsRasterFileWriter
 )
 from qgis.PyQt.QtCore import (
@@ -32,13 +37,28 @@ from qgis.PyQt.QtCore import (
 import processing
 
 from osgeo import gdal
-import numpy as np
-from scipy import signal
+
+from otbn.processing.algorithms.otbn_utils import (
+    filter_chain,
+    mosaic,
+    raster_output,
+    raster_tiles,
+    tile_io,
+    tile_manifest,
+    tile_pool
+)
 
 
 class FiltroRaster(QgsProcessingAlgorithm):
     """FiltroRaster algorithm class."""
 
+    # Métodos de disk_counts para el parametro COUNTER
+    COUNTERS = [
+        ('fft', 'FFT compartida entre radios'),
+        ('spans', 'Sumas prefijas por filas'),
+        ('convolve', 'scipy.signal.convolve')
+    ]
+
 
     def tr(self, string):
         """Return a localized string."""
@@ -69,6 +89,8 @@ class FiltroRaster(QgsProcessingAlgorithm):
         return self.tr(
             """
             Filtrar raster de clasificación para extraer clase(s) a poligonizar.
+
+            La clasificación puede ser un raster, un VRT o una lista de teselas de clasificación, que se leen como un mosaico virtual sin unirlas en disco.
             """
         )
 
@@ -88,7 +110,17 @@ class FiltroRaster(QgsProcessingAlgorithm):
             QgsProcessingParameterRasterLayer(
                 'INPUT',
                 self.tr('Raster de clasificación'),
-                defaultValue=None))
+                defaultValue=None,
+                optional=True))
+
+        # INPUTS
+        self.addParameter(
+            QgsProcessingParameterMultipleLayers(
+                'INPUTS',
+                self.tr('Teselas de clasificación (mosaico virtual, en lugar del raster)'),
+                layerType=QgsProcessing.TypeRaster,
+                defaultValue=None,
+                optional=True))
 
         # CLASES
         self.addParameter(
@@ -151,6 +183,90 @@ class FiltroRaster(QgsProcessingAlgorithm):
                 self.tr('Absorber pixeles adyacentes'),
             defaultValue=True))
 
+        # TILESIZE
+        param = QgsProcessingParameterNumber(
+                'TILESIZE',
+                self.tr('Tamaño de tesela en pixeles (0 = raster completo)'),
+            QgsProcessingParameterNumber.Integer,
+            minValue=0,
+            defaultValue=2048)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # COUNTER
+        param = QgsProcessingParameterEnum(
+                'COUNTER',
+                self.tr('Método de conteo de vecinos'),
+            options=[self.tr(label) for _, label in self.COUNTERS],
+            defaultValue=0)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # WORKERS
+        param = QgsProcessingParameterNumber(
+                'WORKERS',
+                self.tr('Procesos en paralelo'),
+            QgsProcessingParameterNumber.Integer,
+            minValue=1,
+            maxValue=os.cpu_count() or 1,
+            defaultValue=1)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # THREADS
+        param = QgsProcessingParameterNumber(
+                'THREADS',
+                self.tr('Hilos por tesela para los filtrados de radio'),
+            QgsProcessingParameterNumber.Integer,
+            minValue=1,
+            maxValue=4,
+            defaultValue=1)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # SCRATCH
+        param = QgsProcessingParameterFile(
+                'SCRATCH',
+                self.tr('Carpeta para guardar los intermedios en disco (memmap)'),
+            behavior=QgsProcessingParameterFile.Folder,
+            optional=True)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # MAXOPEN
+        param = QgsProcessingParameterNumber(
+                'MAXOPEN',
+                self.tr('Máximo de archivos del mosaico abiertos a la vez'),
+            QgsProcessingParameterNumber.Integer,
+            minValue=2,
+            defaultValue=100)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # COG
+        param = QgsProcessingParameterBoolean(
+                'COG',
+                self.tr('Escribir como Cloud Optimized GeoTIFF'),
+            defaultValue=False)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # OVERVIEWS
+        param = QgsProcessingParameterBoolean(
+                'OVERVIEWS',
+                self.tr('Generar pirámides (remuestreo por moda)'),
+            defaultValue=True)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # INCREMENTAL
+        param = QgsProcessingParameterBoolean(
+                'INCREMENTAL',
+                self.tr('Refiltrar solo las teselas modificadas desde la ejecución anterior'),
+            defaultValue=False)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
         # OUTPUT
         self.addParameter(
             QgsProcessingParameterRasterDestination(
@@ -177,13 +293,35 @@ class FiltroRaster(QgsProcessingAlgorithm):
             'INPUT',
             context)
 
-        dataset = gdal.Open(input_raster.source())
-        geotransform = dataset.GetGeoTransform()
-        projection = dataset.GetProjection()
-        band_n = 1
-        band = dataset.GetRasterBand(band_n)
-        R = np.array(band.ReadAsArray())
 
+        #####
+        # InputRasters source
+        #####
+        input_rasters = self.parameterAsLayerList(
+            parameters,
+            'INPUTS',
+            context)
+
+
+        #####
+        # MAXOPEN
+        #####
+        max_open = self.parameterAsInt(
+            parameters,
+            'MAXOPEN',
+            context)
+
+        # The tiles are read through a VRT, no mosaic is written
+        if input_rasters:
+            source = QgsProcessingUtils.generateTempFilename('mosaico.vrt')
+            mosaic.build_vrt([layer.source() for layer in input_rasters], source)
+        elif input_raster is not None:
+            source = input_raster.source()
+        else:
+            raise QgsProcessingException(
+                self.tr('Indicar el raster o las teselas de clasificación.'))
+
+        gdal_config = mosaic.pool_config(max_open)
 
         #####
         # Clases source
@@ -250,90 +388,76 @@ class FiltroRaster(QgsProcessingAlgorithm):
 
 
         #####
-        # Make Circle
+        # TILESIZE
         #####
-        def make_circle(r):
-            C = np.zeros([2*r+1,2*r+1],dtype=np.byte)
-            for i in range(r):
-                for j in range(r):
-                    if np.sqrt((i+1)*(i+1)+(j+1)*(j+1))<=r+0.4:
-                        C[r-i-1,r-j-1]=1
-                        C[r-i-1,r+j+1]=1
-                        C[r+i+1,r-j-1]=1
-                        C[r+i+1,r+j+1]=1
-            for i in range(r):
-                C[r,r-i-1]=1
-                C[r,r+i+1]=1
-                C[r+i+1,r]=1
-                C[r-i-1,r]=1
-            C[r,r]=1
-            return C
+        tile_size = self.parameterAsInt(
+            parameters,
+            'TILESIZE',
+            context)
 
-        C1 = make_circle(1)
-        C2 = make_circle(2)
-        C3 = make_circle(3)
-        C4 = make_circle(4)
-        C5 = make_circle(5)
+
+        #####
+        # COUNTER
+        #####
+        counter = self.COUNTERS[self.parameterAsEnum(
+            parameters,
+            'COUNTER',
+            context)][0]
 
 
         #####
-        # Enmascarar clases
+        # WORKERS
         #####
-        feedback.pushDebugInfo(f"Extrayendo clase(s)...")
-        M1 = np.logical_or.reduce([R == x for x in clases])
-        if feedback.isCanceled():
-            return {}
+        workers = self.parameterAsInt(
+            parameters,
+            'WORKERS',
+            context)
 
 
         #####
-        # Filtrados
+        # THREADS
         #####
-        feedback.pushDebugInfo(f"Filtrado de radio 2...")
-        M2x=signal.convolve(M1, C2, mode='same')
-        M2=M2x>(C2.sum()*m2p/100)
-        if feedback.isCanceled():
-            return {}
+        threads = self.parameterAsInt(
+            parameters,
+            'THREADS',
+            context)
 
-        feedback.pushDebugInfo(f"Filtrado de radio 3...")
-        M3x=signal.convolve(M1, C3, mode='same')
-        M3=M3x>(C3.sum()*m3p/100)
-        if feedback.isCanceled():
-            return {}
 
-        feedback.pushDebugInfo(f"Filtrado de radio 4...")
-        M4x=signal.convolve(M1, C4, mode='same')
-        M4=M4x>(C4.sum()*m4p/100)
-        if feedback.isCanceled():
-            return {}
+        #####
+        # SCRATCH
+        #####
+        scratch_dir = self.parameterAsFile(
+            parameters,
+            'SCRATCH',
+            context)
 
-        feedback.pushDebugInfo(f"Filtrado de radio 5...")
-        M5x=signal.convolve(M1, C5, mode='same')
-        M5=M5x>(C5.sum()*m5p/100)
-        M6 = M2 + 2*M3 + 4*M4 + 8*M5
-        M7=M6>0
-        if feedback.isCanceled():
-            return {}
 
-        M8=(signal.convolve(M7, C1, mode='same')>0)&M1
-        M9=M7|M8
-        M10=signal.convolve(M9, C3, mode='same')
-        if feedback.isCanceled():
-            return {}
+        #####
+        # COG
+        #####
+        cog = self.parameterAsBool(
+            parameters,
+            'COG',
+            context)
 
-        if m11bool:
-            feedback.pushDebugInfo(f"Filtrado final...")
-            M11=signal.convolve(M10>0, C3, mode='same')==C3.sum()
-        else:
-            M11=M9
-        if feedback.isCanceled():
-            return {}
 
-        if madybool:
-            feedback.pushDebugInfo(f"Absorbiendo pixeles adyacentes...")
-            MAdy=(signal.convolve(M11, C1, mode='same')>0)&M1
-            M11=M11|MAdy
-        if feedback.isCanceled():
-            return {}
+        #####
+        # OVERVIEWS
+        #####
+        overviews = self.parameterAsBool(
+            parameters,
+            'OVERVIEWS',
+            context)
+
+
+        #####
+        # INCREMENTAL
+        #####
+        incremental = self.parameterAsBool(
+            parameters,
+            'INCREMENTAL',
+            context)
+
 
         #####
         # OUTPUT
@@ -344,21 +468,112 @@ class FiltroRaster(QgsProcessingAlgorithm):
         output_format = QgsRasterFileWriter.driverForExtension(
             os.path.splitext(output_file)[-1])
 
-        driver = gdal.GetDriverByName(output_format)
-
-        feedback.pushDebugInfo(f"Escribiendo raster de salida...")
-        dst_ds = driver.Create(output_file,
-                       band.XSize,
-                       band.YSize,
-                       band_n,
-                       band.DataType)
-        dst_ds.GetRasterBand(band_n).WriteArray(M11)
-        dst_ds.SetGeoTransform(geotransform)
-        dst_ds.SetProjection(projection)
-
-        # Flush and cleanup
-        dst_ds = None
-        dataset = None
+        # The dataset pool settings are restored whatever happens below
+        previous_config = mosaic.set_config(gdal_config)
+        try:
+            dataset = gdal.Open(source)
+            band_n = 1
+            band = dataset.GetRasterBand(band_n)
+
+            tiles = list(raster_tiles.tiles(
+                band.XSize,
+                band.YSize,
+                tile_size,
+                band.GetBlockSize(),
+                filter_chain.HALO))
+
+
+            #####
+            # Teselas modificadas
+            #####
+            manifest = None
+            update = False
+            if incremental:
+                manifest = tile_manifest.TileManifest(output_file, [
+                    sorted(set(clases)),
+                    [m2p, m3p, m4p, m5p],
+                    m11bool,
+                    madybool,
+                    tile_size,
+                    band.XSize,
+                    band.YSize,
+                    list(dataset.GetGeoTransform()),
+                    band.GetNoDataValue()])
+
+                # A COG can not be patched, it is written again
+                update = bool(manifest.previous) and not cog
+
+                feedback.pushDebugInfo(f"Comparando {len(tiles)} tesela(s) con la ejecución anterior...")
+                changed = [tile for tile in tiles if manifest.changed(tile, band)]
+                if update:
+                    feedback.pushDebugInfo(f"Se refiltran {len(changed)} tesela(s) modificadas.")
+                    tiles = changed
+
+            writer = tile_io.BackgroundWriter(raster_output.MaskWriter(
+                output_file,
+                output_format,
+                dataset,
+                band,
+                cog,
+                update,
+                overviews))
+
+
+            #####
+            # Filtrado por teselas
+            #####
+            options = {
+                'clases': clases,
+                'percents': (m2p, m3p, m4p, m5p),
+                'm11bool': m11bool,
+                'madybool': madybool,
+                'counter': counter,
+                'scratch': scratch_dir or None,
+                'threads': threads
+            }
+
+            feedback.pushDebugInfo(f"Filtrando {len(tiles)} tesela(s) en {workers} proceso(s)...")
+            results = tile_pool.imap(
+                band,
+                source,
+                band_n,
+                tiles,
+                options,
+                workers,
+                gdal_config)
+            skipped = 0
+            try:
+                for i, (tile, packed, packed_valid) in enumerate(results):
+                    if feedback.isCanceled():
+                        break
+                    if packed is None:
+                        skipped += 1
+                    writer.write(
+                        tile,
+                        tile_pool.unpack(tile, packed),
+                        tile_pool.unpack(tile, packed_valid))
+                    feedback.setProgress(100 * (i + 1) / len(tiles))
+            finally:
+                # Flush and cleanup, also if a tile fails
+                results.close()
+                if not feedback.isCanceled():
+                    feedback.pushDebugInfo(f"Cerrando raster de salida...")
+                writer.close(not feedback.isCanceled())
+        finally:
+            band = None
+            dataset = None
+            mosaic.set_config(previous_config)
+
+        feedback.pushDebugInfo(f"Se omitieron {skipped} tesela(s) sin clases a extraer.")
+
+        # A canceled update keeps the previous hashes, so the tiles not
+        # yet patched are still found changed on the next run
+        if manifest is not None:
+            if not feedback.isCanceled():
+                manifest.save()
+            elif not update:
+                manifest.discard()
+
         if feedback.isCanceled():
             return {}
 
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : filtrorasterbarrido_algorithm.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import itertools
+import os
+import tempfile
+
+from qgis.core import (
+    QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingParameterDefinition,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFile,
+    QgsProcessingParameterFolderDestination,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterRasterLayer,
+    QgsProcessingParameterString
+)
+from qgis.PyQt.QtCore import (
+    QCoreApplication
+)
+
+from osgeo import gdal
+
+from otbn.processing.algorithms.otbn_utils import (
+    binary_morphology,
+    count_cache,
+    filter_chain,
+    raster_output,
+    raster_tiles
+)
+
+
+class FiltroRasterBarrido(QgsProcessingAlgorithm):
+    """FiltroRasterBarrido algorithm class."""
+
+
+    def tr(self, string):
+        """Return a localized string."""
+        return QCoreApplication.translate('Otbn', string)
+
+    def createInstance(self):
+        """Return a new instance of the algorithm."""
+        return FiltroRasterBarrido()
+
+    def name(self):
+        """Return the algorithm name."""
+        return 'filtrorasterbarrido'
+
+    def displayName(self):
+        """Return the algorithm display name."""
+        return self.tr('01 - Filtro Raster (barrido de umbrales)')
+
+    def group(self):
+        """Return the name of the group this algorithm belongs to."""
+        return ''
+
+    def groupId(self):
+        """Return the unique ID of the group this algorithm belongs to."""
+        return ''
+
+    def shortHelpString(self):
+        """Return the display help of the algortihm."""
+        return self.tr(
+            """
+            Filtrar raster de clasificación para cada combinación de porcentajes de cobertura.
+            Los conteos de vecinos se calculan una sola vez y se guardan en la carpeta de caché.
+            """
+        )
+
+    def shortDescription(self):
+        """Return the display description of the algorithm."""
+        return self.tr('Filtrar raster de clasificación para cada combinación de porcentajes de cobertura.')
+
+    #####
+    # Inicialización de parametros
+    #####
+    def initAlgorithm(self, config=None):
+        """Define inputs and outputs of the algorithm."""
+        advanced_flag = QgsProcessingParameterDefinition.FlagAdvanced
+
+        # INPUT
+        self.addParameter(
+            QgsProcessingParameterRasterLayer(
+                'INPUT',
+                self.tr('Raster de clasificación'),
+                defaultValue=None))
+
+        # CLASES
+        self.addParameter(
+            QgsProcessingParameterString(
+                'CLASES',
+                self.tr('Clase(s) a extraer (separadas por coma)'),
+                defaultValue=None))
+
+        # M2P, M3P, M4P, M5P
+        for r in range(2, 6):
+            self.addParameter(
+                QgsProcessingParameterString(
+                    f'M{r}P',
+                    self.tr('Porcentajes de cobertura para Radio {} (separados por coma)').format(r),
+                    defaultValue='50'))
+
+        # M11BOOL
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                'M11BOOL',
+                self.tr('Suavizado final'),
+            options=[self.tr('No'), self.tr('Sí')],
+            allowMultiple=True,
+            defaultValue=[1]))
+
+        # MADYBOOL
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                'MADYBOOL',
+                self.tr('Absorber pixeles adyacentes'),
+            options=[self.tr('No'), self.tr('Sí')],
+            allowMultiple=True,
+            defaultValue=[1]))
+
+        # CACHE
+        param = QgsProcessingParameterFile(
+                'CACHE',
+                self.tr('Carpeta de caché de conteos'),
+            behavior=QgsProcessingParameterFile.Folder,
+            optional=True)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # TILESIZE
+        param = QgsProcessingParameterNumber(
+                'TILESIZE',
+                self.tr('Tamaño de tesela en pixeles (0 = raster completo)'),
+            QgsProcessingParameterNumber.Integer,
+            minValue=0,
+            defaultValue=2048)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # OUTPUT
+        self.addParameter(
+            QgsProcessingParameterFolderDestination(
+                'OUTPUT',
+                self.tr('Carpeta de salida')))
+
+
+    #####
+    # PROCESAMIENTO
+    #####
+    def processAlgorithm(self, parameters, context, feedback):
+        """Filtrar raster de clasificación para cada combinación de porcentajes.
+        """
+
+        #####
+        # InputRaster source
+        #####
+        input_raster = self.parameterAsRasterLayer(
+            parameters,
+            'INPUT',
+            context)
+
+        dataset = gdal.Open(input_raster.source())
+        band_n = 1
+        band = dataset.GetRasterBand(band_n)
+
+
+        #####
+        # Clases source
+        #####
+        clases_str = self.parameterAsString(
+            parameters,
+            'CLASES',
+            context)
+        clases = [int(clase) for clase in clases_str.split(',')]
+
+
+        #####
+        # M2P, M3P, M4P, M5P
+        #####
+        percents = []
+        for r in range(2, 6):
+            values_str = self.parameterAsString(
+                parameters,
+                f'M{r}P',
+                context)
+            values = [int(value) for value in values_str.split(',')]
+            if any(value < 0 or value > 100 for value in values):
+                raise QgsProcessingException(
+                    self.tr('Los porcentajes para Radio {} deben estar entre 0 y 100.').format(r))
+            percents.append(values)
+
+
+        #####
+        # M11BOOL, MADYBOOL
+        #####
+        m11bools = [bool(i) for i in self.parameterAsEnums(
+            parameters,
+            'M11BOOL',
+            context)]
+        madybools = [bool(i) for i in self.parameterAsEnums(
+            parameters,
+            'MADYBOOL',
+            context)]
+
+
+        #####
+        # CACHE
+        #####
+        cache_dir = self.parameterAsFile(
+            parameters,
+            'CACHE',
+            context)
+        if not cache_dir:
+            cache_dir = os.path.join(tempfile.gettempdir(), 'otbn_conteos')
+        cache = count_cache.CountCache(
+            cache_dir,
+            input_raster.source(),
+            band_n,
+            clases)
+        if not cache.enabled:
+            feedback.pushWarning(
+                "El raster no es un archivo, los conteos no se guardan en la caché.")
+
+
+        #####
+        # TILESIZE
+        #####
+        tile_size = self.parameterAsInt(
+            parameters,
+            'TILESIZE',
+            context)
+
+
+        #####
+        # OUTPUT
+        #####
+        output_folder = self.parameterAsString(parameters, 'OUTPUT', context)
+        os.makedirs(output_folder, exist_ok=True)
+
+
+        #####
+        # Filtrado por tesela
+        #####
+        tiles = list(raster_tiles.tiles(
+            band.XSize,
+            band.YSize,
+            tile_size,
+            band.GetBlockSize(),
+            filter_chain.HALO))
+
+        nodata = band.GetNoDataValue()
+        combinations = list(itertools.product(*percents, m11bools, madybools))
+        writers = []
+        for m2p, m3p, m4p, m5p, m11bool, madybool in combinations:
+            output_file = os.path.join(
+                output_folder,
+                f'filtro_{m2p}_{m3p}_{m4p}_{m5p}_s{int(m11bool)}_a{int(madybool)}.tif')
+            writers.append(raster_output.MaskWriter(
+                output_file,
+                'GTiff',
+                dataset,
+                band))
+
+        # Los conteos de cada tesela se cargan una vez para todas las combinaciones
+        feedback.pushDebugInfo(f"Filtrando {len(combinations)} combinación(es) en {len(tiles)} tesela(s)...")
+        for i, tile in enumerate(tiles):
+            if feedback.isCanceled():
+                break
+
+            def compute():
+                R = band.ReadAsArray(*tile.read_window)
+                arrays = filter_chain.counts(R, clases, 'spans')
+                valid = raster_output.valid_mask(R[tile.inner], nodata)
+                if valid is not None:
+                    arrays += (binary_morphology.pack(valid),)
+                return arrays
+
+            arrays = cache.get(tile, compute)
+            valid = None
+            if len(arrays) > 2:
+                valid = binary_morphology.unpack(arrays[2], tile.xsize)
+
+            for writer, (m2p, m3p, m4p, m5p, m11bool, madybool) in zip(writers, combinations):
+                if arrays[0].any():
+                    M11 = filter_chain.from_counts(
+                        arrays[0],
+                        arrays[1],
+                        (m2p, m3p, m4p, m5p),
+                        m11bool,
+                        madybool)[tile.inner]
+                else:
+                    # Sin clases a extraer en la tesela ni en su halo
+                    M11 = None
+                writer.write(tile, M11, valid)
+            feedback.setProgress(100 * (i + 1) / len(tiles))
+
+        # Flush
+        feedback.pushDebugInfo(f"Cerrando {len(writers)} raster(s) de salida...")
+        for writer in writers:
+            writer.close(not feedback.isCanceled())
+        dataset = None
+        if feedback.isCanceled():
+            return {}
+
+        return {'OUTPUT': output_folder}
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : filtrorasterlote_algorithm.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import os
+
+from qgis.core import (
+    QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingParameterBoolean,
+    QgsProcessingParameterDefinition,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFolderDestination,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterRasterLayer,
+    QgsProcessingParameterString
+)
+from qgis.PyQt.QtCore import (
+    QCoreApplication
+)
+
+from osgeo import gdal
+
+from otbn.processing.algorithms.filtroraster_algorithm import FiltroRaster
+from otbn.processing.algorithms.otbn_utils import (
+    filter_chain,
+    raster_output,
+    raster_tiles
+)
+
+
+class FiltroRasterLote(QgsProcessingAlgorithm):
+    """FiltroRasterLote algorithm class."""
+
+
+    def tr(self, string):
+        """Return a localized string."""
+        return QCoreApplication.translate('Otbn', string)
+
+    def createInstance(self):
+        """Return a new instance of the algorithm."""
+        return FiltroRasterLote()
+
+    def name(self):
+        """Return the algorithm name."""
+        return 'filtrorasterlote'
+
+    def displayName(self):
+        """Return the algorithm display name."""
+        return self.tr('01 - Filtro Raster (lote de clases y bandas)')
+
+    def group(self):
+        """Return the name of the group this algorithm belongs to."""
+        return ''
+
+    def groupId(self):
+        """Return the unique ID of the group this algorithm belongs to."""
+        return ''
+
+    def shortHelpString(self):
+        """Return the display help of the algortihm."""
+        return self.tr(
+            """
+            Filtrar varias bandas de un raster de clasificación para varios grupos de clases, leyendo el raster una sola vez.
+            Los grupos de clases se separan con punto y coma, por ejemplo: 1,2;3
+            """
+        )
+
+    def shortDescription(self):
+        """Return the display description of the algorithm."""
+        return self.tr('Filtrar varias bandas de un raster de clasificación para varios grupos de clases.')
+
+    #####
+    # Inicialización de parametros
+    #####
+    def initAlgorithm(self, config=None):
+        """Define inputs and outputs of the algorithm."""
+        advanced_flag = QgsProcessingParameterDefinition.FlagAdvanced
+
+        # INPUT
+        self.addParameter(
+            QgsProcessingParameterRasterLayer(
+                'INPUT',
+                self.tr('Raster de clasificación'),
+                defaultValue=None))
+
+        # BANDS
+        self.addParameter(
+            QgsProcessingParameterString(
+                'BANDS',
+                self.tr('Banda(s) a filtrar (separadas por coma)'),
+                defaultValue='1'))
+
+        # CLASES
+        self.addParameter(
+            QgsProcessingParameterString(
+                'CLASES',
+                self.tr('Grupos de clase(s) a extraer (clases separadas por coma, grupos por punto y coma)'),
+                defaultValue=None))
+
+        # M2P, M3P, M4P, M5P
+        for r in range(2, 6):
+            self.addParameter(
+                QgsProcessingParameterNumber(
+                    f'M{r}P',
+                    self.tr('Porcentaje de cobertura para Radio {}').format(r),
+                QgsProcessingParameterNumber.Integer,
+                minValue=0,
+                maxValue=100,
+                defaultValue=50))
+
+        # M11BOOL
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                'M11BOOL',
+                self.tr('Suavizado final'),
+            defaultValue=True))
+
+        # MADYBOOL
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                'MADYBOOL',
+                self.tr('Absorber pixeles adyacentes'),
+            defaultValue=True))
+
+        # TILESIZE
+        param = QgsProcessingParameterNumber(
+                'TILESIZE',
+                self.tr('Tamaño de tesela en pixeles (0 = raster completo)'),
+            QgsProcessingParameterNumber.Integer,
+            minValue=0,
+            defaultValue=2048)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # COUNTER
+        param = QgsProcessingParameterEnum(
+                'COUNTER',
+                self.tr('Método de conteo de vecinos'),
+            options=[self.tr(label) for _, label in FiltroRaster.COUNTERS],
+            defaultValue=0)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # OUTPUT
+        self.addParameter(
+            QgsProcessingParameterFolderDestination(
+                'OUTPUT',
+                self.tr('Carpeta de salida')))
+
+
+    #####
+    # PROCESAMIENTO
+    #####
+    def processAlgorithm(self, parameters, context, feedback):
+        """Filtrar varias bandas para varios grupos de clases.
+        """
+
+        #####
+        # InputRaster source
+        #####
+        input_raster = self.parameterAsRasterLayer(
+            parameters,
+            'INPUT',
+            context)
+
+        dataset = gdal.Open(input_raster.source())
+
+
+        #####
+        # BANDS
+        #####
+        bands_str = self.parameterAsString(
+            parameters,
+            'BANDS',
+            context)
+        # Repeated bands would write the same output file twice
+        bands_n = list(dict.fromkeys(int(band_n) for band_n in bands_str.split(',')))
+        for band_n in bands_n:
+            if band_n < 1 or band_n > dataset.RasterCount:
+                raise QgsProcessingException(
+                    self.tr('El raster no tiene la banda {}.').format(band_n))
+        bands = [dataset.GetRasterBand(band_n) for band_n in bands_n]
+
+
+        #####
+        # Clases source
+        #####
+        clases_str = self.parameterAsString(
+            parameters,
+            'CLASES',
+            context)
+        # Groups are sorted, so repeated ones, in any order, give the
+        # same output file and are filtered once
+        clases_sets = [
+            list(clases) for clases in dict.fromkeys(
+                tuple(sorted(set(int(clase) for clase in grupo.split(','))))
+                for grupo in clases_str.split(';')
+                if grupo.strip())]
+
+
+        #####
+        # M2P, M3P, M4P, M5P
+        #####
+        percents = tuple(
+            self.parameterAsInt(parameters, f'M{r}P', context)
+            for r in range(2, 6))
+
+
+        #####
+        # M11BOOL
+        #####
+        m11bool = self.parameterAsBool(
+            parameters,
+            'M11BOOL',
+            context)
+
+
+        #####
+        # MADYBOOL
+        #####
+        madybool = self.parameterAsBool(
+            parameters,
+            'MADYBOOL',
+            context)
+
+
+        #####
+        # TILESIZE
+        #####
+        tile_size = self.parameterAsInt(
+            parameters,
+            'TILESIZE',
+            context)
+
+
+        #####
+        # COUNTER
+        #####
+        counter = FiltroRaster.COUNTERS[self.parameterAsEnum(
+            parameters,
+            'COUNTER',
+            context)][0]
+
+
+        #####
+        # OUTPUT
+        #####
+        output_folder = self.parameterAsString(parameters, 'OUTPUT', context)
+        os.makedirs(output_folder, exist_ok=True)
+
+        # Una salida por banda y grupo de clases
+        outputs = []
+        for band_n, band in zip(bands_n, bands):
+            band_outputs = []
+            for clases in clases_sets:
+                output_file = os.path.join(
+                    output_folder,
+                    f"filtro_b{band_n}_c{'-'.join(str(clase) for clase in clases)}.tif")
+                band_outputs.append(raster_output.MaskWriter(
+                    output_file,
+                    'GTiff',
+                    dataset,
+                    band))
+            outputs.append(band_outputs)
+
+
+        #####
+        # Filtrado por teselas
+        #####
+        tiles = list(raster_tiles.tiles(
+            dataset.RasterXSize,
+            dataset.RasterYSize,
+            tile_size,
+            bands[0].GetBlockSize(),
+            filter_chain.HALO))
+
+        feedback.pushDebugInfo(
+            f"Filtrando {len(bands)} banda(s) y {len(clases_sets)} grupo(s) de clases en {len(tiles)} tesela(s)...")
+        for i, tile in enumerate(tiles):
+            if feedback.isCanceled():
+                break
+            for band, band_outputs in zip(bands, outputs):
+                # Una lectura y una pasada de la tabla de clases por banda
+                R = band.ReadAsArray(*tile.read_window)
+                M1s = filter_chain.class_masks(R, clases_sets)
+                valid = raster_output.valid_mask(R[tile.inner], band.GetNoDataValue())
+                for M1, writer in zip(M1s, band_outputs):
+                    if not M1.any():
+                        writer.write(tile, None, valid)
+                        continue
+                    M11 = filter_chain.filter_mask(
+                        M1,
+                        percents,
+                        m11bool,
+                        madybool,
+                        counter)
+                    writer.write(tile, M11[tile.inner], valid)
+            feedback.setProgress(100 * (i + 1) / len(tiles))
+
+        # Flush and cleanup
+        for band_outputs in outputs:
+            for writer in band_outputs:
+                writer.close(not feedback.isCanceled())
+        outputs = None
+        dataset = None
+        if feedback.isCanceled():
+            return {}
+
+        return {'OUTPUT': output_folder}
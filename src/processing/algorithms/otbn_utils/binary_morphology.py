@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : binary_morphology.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import numpy as np
+
+from otbn.processing.algorithms.otbn_utils.disk_counts import (
+    kernel_spans,
+    shift_slices
+)
+
+
+def pack(M):
+    """Return the boolean mask M bit-packed along its rows, 8 pixels per byte."""
+    return np.packbits(M, axis=1)
+
+
+def unpack(P, width):
+    """Return the boolean mask of width columns packed in P."""
+    return np.unpackbits(P, axis=1, count=width).view(bool)
+
+
+def _clear_pad(P, width):
+    """Clear the bits of the last byte of each row beyond width."""
+    tail = P.shape[1] * 8 - width
+    if tail:
+        P[:, -1] &= np.uint8((0xFF << tail) & 0xFF)
+
+
+def _shift_bits(P, dx, width):
+    """Return the packed mask P shifted by dx columns.
+
+    Bit x of the result takes bit x+dx of P, unset when outside the
+    width columns of the mask.
+    """
+
+    q, s = divmod(abs(dx), 8)
+    s = np.uint8(s)
+    n = P.shape[1]
+    Q = np.zeros_like(P)
+    if q >= n:
+        return Q
+
+    if dx > 0:
+        Q[:, :n-q] = P[:, q:] << s
+        if s and q + 1 < n:
+            Q[:, :n-q-1] |= P[:, q+1:] >> (np.uint8(8) - s)
+    else:
+        Q[:, q:] = P[:, :n-q] >> s
+        if s and q + 1 < n:
+            Q[:, q+1:] |= P[:, :n-q-1] << (np.uint8(8) - s)
+        # Bits shifted past the last column land on the row padding
+        _clear_pad(Q, width)
+
+    return Q
+
+
+def _combine(out, src, dy, dx, op, width):
+    """Combine into out the src array shifted by (dy, dx) with op.
+
+    Pixels whose shifted source falls outside the array are combined
+    with False, as the zero padding of a 'same' convolution does. With
+    a width, out and src are packed masks of that many columns.
+    """
+
+    if width is not None:
+        if dx:
+            # Columns outside the mask come in as unset bits
+            src = _shift_bits(src, dx, width)
+        dx = 0
+
+    dst, src_slices = shift_slices(out.shape, dy, dx)
+    op(out[dst], src[src_slices], out=out[dst])
+
+    # OR with False leaves the border rows and columns as they are
+    if op is np.logical_or or op is np.bitwise_or:
+        return
+    out[:dst[0].start] = False
+    out[dst[0].stop:] = False
+    out[:, :dst[1].start] = False
+    out[:, dst[1].stop:] = False
+
+
+def _apply(M, C, op, init, width):
+    """Combine M over the taps of a symmetric kernel C with op."""
+
+    spans = kernel_spans(C)
+    out = np.full(M.shape, init, dtype=M.dtype)
+
+    if spans is None or any(lo != -hi for lo, hi in spans.values()):
+        r0 = (C.shape[0] - 1) // 2
+        c0 = (C.shape[1] - 1) // 2
+        for i, j in zip(*np.nonzero(C)):
+            _combine(out, M, r0 - i, c0 - j, op, width)
+    else:
+        # Combine each row run horizontally once per half width, growing
+        # the run by one column per side, then stack the runs vertically
+        runs = [M]
+        for k in range(1, max(hi for _, hi in spans.values()) + 1):
+            H = runs[-1].copy()
+            _combine(H, M, 0, k, op, width)
+            _combine(H, M, 0, -k, op, width)
+            runs.append(H)
+
+        for dy, (_, hi) in spans.items():
+            _combine(out, runs[hi], dy, 0, op, width)
+
+    if width is not None:
+        _clear_pad(out, width)
+
+    return out
+
+
+def dilate(M, C, width=None):
+    """Return the dilation of the mask M by the kernel C.
+
+    Same as signal.convolve(M, C, mode='same') > 0. M is a boolean
+    mask, or a packed one (see pack) of width columns.
+    """
+    if width is None:
+        return _apply(M, C, np.logical_or, False, None)
+    return _apply(M, C, np.bitwise_or, 0, width)
+
+
+def erode(M, C, width=None):
+    """Return the erosion of the mask M by the kernel C.
+
+    Same as signal.convolve(M, C, mode='same') == C.sum(), pixels
+    outside the array count as unset. M is a boolean mask, or a packed
+    one (see pack) of width columns.
+    """
+    if width is None:
+        return _apply(M, C, np.logical_and, True, None)
+    return _apply(M, C, np.bitwise_and, 0xFF, width)
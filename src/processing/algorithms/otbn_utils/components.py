@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : components.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import math
+
+import numpy as np
+from osgeo import gdal
+from scipy import ndimage, sparse
+from scipy.sparse import csgraph
+
+from otbn.processing.algorithms.otbn_utils import (
+    raster_output,
+    raster_tiles
+)
+
+
+# 4-connectivity, as gdal:polygonize without EIGHT_CONNECTEDNESS
+STRUCTURE = ndimage.generate_binary_structure(2, 1)
+
+
+def pixel_area(geotransform):
+    """Return the area of a pixel, in squared units of the raster CRS."""
+    gt = geotransform
+    return abs(gt[1] * gt[5] - gt[2] * gt[4])
+
+
+def max_pixels(ha, geotransform):
+    """Return the largest pixel count of at most ha hectares."""
+    return math.floor(ha * 10000 / pixel_area(geotransform) + 1e-9)
+
+
+def min_pixels(ha, geotransform):
+    """Return the smallest pixel count of at least ha hectares."""
+    return math.ceil(ha * 10000 / pixel_area(geotransform) - 1e-9)
+
+
+def sizes(M):
+    """Return the labels of the components of M and their pixel counts.
+
+    The counts are indexed by label, 0 being the background.
+    """
+
+    labels, _ = ndimage.label(M, structure=STRUCTURE)
+    return labels, np.bincount(labels.ravel())
+
+
+def fill_holes(M, background, max_count):
+    """Return M with its background components of up to max_count pixels set.
+
+    The components are those the class-0 polygons of gdal:polygonize
+    would cover, so they are filled whether or not they are enclosed
+    by M, as the union of the small class-0 polygons does.
+    """
+
+    labels, counts = sizes(background)
+    small = counts <= max_count
+    small[0] = False
+
+    return M | small[labels]
+
+
+class TiledComponents:
+    """Components of a mask that is computed and labeled tile by tile.
+
+    The first pass labels each tile, keeping only its pixel counts and
+    the labels on its edges. Labels that meet across a seam are joined
+    as connected components of a graph of the seam pairs, which gives
+    the size of each component over the whole raster. sizes() labels a
+    tile again and maps its pixels to those sizes.
+    """
+
+    def __init__(self, tiles, mask):
+        self.offsets = {}
+        counts = [np.zeros(1, dtype=np.int64)]
+        edges = {}
+        n = 1
+
+        for tile in tiles:
+            labels, k = ndimage.label(mask(tile), structure=STRUCTURE)
+            key = (tile.xoff, tile.yoff)
+            self.offsets[key] = n - 1
+            counts.append(np.bincount(labels.ravel(), minlength=k + 1)[1:])
+            labels = self._global(labels, n - 1)
+            edges[key] = (labels[:, -1].copy(), labels[-1].copy(),
+                          labels[:, 0].copy(), labels[0].copy())
+            n += k
+
+        # Pairs of labels on both sides of the right and bottom seams
+        a = [np.zeros(0, dtype=np.int64)]
+        b = [np.zeros(0, dtype=np.int64)]
+        for tile in tiles:
+            right, bottom, _, _ = edges[(tile.xoff, tile.yoff)]
+            for edge, neighbour, side in (
+                    (right, (tile.xoff + tile.xsize, tile.yoff), 2),
+                    (bottom, (tile.xoff, tile.yoff + tile.ysize), 3)):
+                if neighbour in edges:
+                    other = edges[neighbour][side]
+                    both = (edge > 0) & (other > 0)
+                    a.append(edge[both])
+                    b.append(other[both])
+        a = np.concatenate(a)
+        b = np.concatenate(b)
+
+        graph = sparse.coo_matrix((np.ones(len(a), dtype=np.int8), (a, b)), shape=(n, n))
+        _, self.root = csgraph.connected_components(graph, directed=False)
+        self.root_sizes = np.bincount(self.root, weights=np.concatenate(counts))
+
+    @staticmethod
+    def _global(labels, offset):
+        return np.where(labels > 0, labels.astype(np.int64) + offset, 0)
+
+    def labels(self, tile, M):
+        """Return the component of each pixel of M in tile, 0 outside M.
+
+        M must be the mask the tile was labeled from. Components are
+        numbered over the whole raster, as indices of root_sizes.
+        """
+
+        labels, _ = ndimage.label(M, structure=STRUCTURE)
+        labels = self.root[self._global(labels, self.offsets[(tile.xoff, tile.yoff)])]
+        labels[~M] = 0
+
+        return labels
+
+    def sizes(self, tile, M):
+        """Return the pixel count of the component of each pixel of M in tile.
+
+        Pixels outside M get 0.
+        """
+
+        sizes = self.root_sizes[self.labels(tile, M)]
+        sizes[~M] = 0
+
+        return sizes
+
+
+def _filter_raster_tiled(dataset, band, dst_band, holesha, poligha, tile_size):
+    """Fill the holes and remove the small components of band, by tiles.
+
+    The raster is read three times: to size the holes, to size the
+    filled components, and to write their labels. Returns the pixel
+    count of each label.
+    """
+
+    geotransform = dataset.GetGeoTransform()
+    max_count = max_pixels(holesha, geotransform)
+    min_count = min_pixels(poligha, geotransform)
+    tiles = list(raster_tiles.tiles(
+        band.XSize,
+        band.YSize,
+        tile_size,
+        band.GetBlockSize(),
+        0))
+
+    def read(tile):
+        R = band.ReadAsArray(*tile.read_window)
+        valid = band.GetMaskBand().ReadAsArray(*tile.read_window) != 0
+        return (R == 1) & valid, (R == 0) & valid
+
+    def background(tile):
+        return read(tile)[1]
+
+    holes = TiledComponents(tiles, background)
+
+    def filled(tile):
+        M, B = read(tile)
+        return M | (B & (holes.sizes(tile, B) <= max_count))
+
+    parts = TiledComponents(tiles, filled)
+
+    for tile in tiles:
+        M = filled(tile)
+        labels = parts.labels(tile, M)
+        labels[parts.root_sizes[labels] < min_count] = 0
+        dst_band.WriteArray(labels.astype(np.uint32), tile.xoff, tile.yoff)
+
+    return parts.root_sizes.astype(np.int64)
+
+
+def filter_raster(source, output_file, holesha, poligha, tile_size=0):
+    """Write the labels of the class-1 components of source that polygonize.
+
+    The class-0 holes of up to holesha hectares are filled first, then
+    the components of less than poligha hectares are removed. Each
+    remaining component is written with its own label and the other
+    pixels are nodata, so polygonizing output_file yields one polygon
+    per component, with its label as value. With a tile_size, the
+    raster is processed by tiles and never loaded whole.
+
+    Returns the pixel count of each label, to size the polygons
+    without measuring them.
+    """
+
+    dataset = gdal.Open(source)
+    band = dataset.GetRasterBand(1)
+    geotransform = dataset.GetGeoTransform()
+
+    dst_ds = gdal.GetDriverByName('GTiff').Create(
+        output_file,
+        band.XSize,
+        band.YSize,
+        1,
+        gdal.GDT_UInt32,
+        options=[option for option in raster_output.GTIFF_OPTIONS
+                 if not option.startswith('NBITS')])
+    dst_ds.SetGeoTransform(geotransform)
+    dst_ds.SetProjection(dataset.GetProjection())
+    dst_band = dst_ds.GetRasterBand(1)
+    dst_band.SetNoDataValue(0)
+
+    if tile_size > 0:
+        counts = _filter_raster_tiled(dataset, band, dst_band, holesha, poligha, tile_size)
+    else:
+        R = band.ReadAsArray()
+        valid = band.GetMaskBand().ReadAsArray() != 0
+        M = fill_holes(
+            (R == 1) & valid,
+            (R == 0) & valid,
+            max_pixels(holesha, geotransform))
+        labels, counts = sizes(M)
+        labels[counts[labels] < min_pixels(poligha, geotransform)] = 0
+        dst_band.WriteArray(labels.astype(np.uint32))
+
+    dst_ds = None
+
+    return counts
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : count_cache.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+def _key(source, band_n, clases):
+    """Return the cache key of a band of source filtered for clases.
+
+    Returns None if source is not a plain file, such as a GDAL
+    subdataset, a /vsi path, a URL or a source with options, as its
+    changes can not be detected.
+    """
+
+    # A rewritten input changes its size or modification time
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+
+    data = json.dumps([
+        os.path.abspath(source),
+        [stat.st_size, stat.st_mtime_ns],
+        band_n,
+        sorted(set(clases))])
+
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class CountCache:
+    """On-disk cache of filter_chain.counts for the tiles of a raster.
+
+    Entries are keyed by the input file, band and classes, and by the
+    read window of each tile, so any tile size can share the cache.
+    Inputs that are not plain files are not cached, and enabled is
+    False.
+    """
+
+    def __init__(self, directory, source, band_n, clases):
+        key = _key(source, band_n, clases)
+        self.enabled = key is not None
+        self.directory = None
+        if self.enabled:
+            self.directory = os.path.join(directory, key)
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, tile):
+        return os.path.join(
+            self.directory,
+            '{}_{}_{}_{}.npz'.format(*tile.read_window))
+
+    def get(self, tile, compute):
+        """Return the arrays cached for tile, calling compute() on a miss.
+
+        compute returns a tuple of arrays, such as the (M1p, Mx) output
+        of filter_chain.counts; the same tuple is returned from the cache.
+        """
+
+        if not self.enabled:
+            return compute()
+
+        path = self._path(tile)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                return tuple(data[f'arr_{i}'] for i in range(len(data.files)))
+
+        arrays = compute()
+
+        # Write aside and rename, so an interrupted run leaves no
+        # truncated entry behind
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, *arrays)
+        os.replace(tmp_path, path)
+
+        return arrays
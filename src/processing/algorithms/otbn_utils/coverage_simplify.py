@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : coverage_simplify.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import struct
+
+import numpy as np
+from osgeo import ogr
+
+
+def simplify_line(coords, tolerance):
+    """Return coords simplified with Douglas-Peucker, keeping both ends.
+
+    Uses GEOS through OGR, as ST_Simplify does.
+    """
+
+    wkb = struct.pack('<BII', 1, ogr.wkbLineString, len(coords)) + coords.astype('<f8').tobytes()
+    line = ogr.CreateGeometryFromWkb(wkb).Simplify(tolerance)
+    points = line.GetPoints() if line is not None else None
+    if not points:
+        return coords[[0, -1]]
+
+    return np.array(points, dtype=float)[:, :2]
+
+
+def _chain_key(chain, free):
+    """Return the chain of vertex ids in its canonical direction, and whether it was reversed.
+
+    A free chain is a whole ring without nodes, which may start at any
+    vertex. Other chains keep their endpoints, nodes that must stay
+    fixed, even when both ends are the same node.
+    """
+
+    if free:
+        # Start at its lowest vertex
+        start = int(np.argmin(chain[:-1]))
+        chain = np.concatenate([chain[start:-1], chain[:start + 1]])
+
+    if chain[0] == chain[-1]:
+        # Loop: towards the lowest neighbour of its start
+        reverse = chain[-2] < chain[1]
+    else:
+        reverse = chain[-1] < chain[0]
+
+    if reverse:
+        chain = chain[::-1]
+
+    return tuple(chain.tolist()), reverse
+
+
+def simplify_rings(rings, tolerance, simplify=simplify_line):
+    """Simplify a coverage of rings, each shared edge once.
+
+    rings is a list of (n, 2) arrays of ring vertices, without the
+    closing vertex. The rings are split into edges at the nodes of the
+    coverage, the vertices where more than two boundary segments meet,
+    so the part of a boundary shared by two rings is one edge. Each edge
+    is simplified once with its nodes fixed, and the rings are rebuilt
+    from them. Returns the simplified rings, closed, or None for the
+    rings that collapse.
+    """
+
+    if not rings:
+        return []
+
+    sizes = np.array([len(ring) for ring in rings])
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    points, vertex_ids = np.unique(np.concatenate(rings), axis=0, return_inverse=True)
+    vertex_ids = vertex_ids.ravel()
+
+    # Boundary segments, each counted once, give the degree of each vertex
+    following = np.arange(len(vertex_ids)) + 1
+    following[starts + sizes - 1] = starts
+    a, b = vertex_ids, vertex_ids[following]
+    segments = np.stack([np.minimum(a, b), np.maximum(a, b)], axis=1)[a != b]
+    segments = np.unique(segments, axis=0)
+    nodes = np.bincount(segments.ravel(), minlength=len(points)) != 2
+
+    edges = {}
+    simplified_rings = []
+    for start, size in zip(starts, sizes):
+        ids = vertex_ids[start:start + size]
+        at = np.flatnonzero(nodes[ids])
+        free = len(at) == 0
+        if not free:
+            ids = np.roll(ids, -at[0])
+            at = np.append(at - at[0], size)
+        else:
+            at = np.array([0, size])
+        ids = np.append(ids, ids[0])
+
+        parts = []
+        for i, j in zip(at[:-1], at[1:]):
+            key, reverse = _chain_key(ids[i:j + 1], free)
+            if key not in edges:
+                edges[key] = simplify(points[list(key)], tolerance)
+            coords = edges[key]
+            parts.append(coords[::-1] if reverse else coords)
+
+        ring = np.concatenate([parts[0]] + [part[1:] for part in parts[1:]])
+        if len(np.unique(ring[:-1], axis=0)) < 3:
+            simplified_rings.append(None)
+        else:
+            simplified_rings.append(ring)
+
+    return simplified_rings
+
+
+def polygon_wkb(rings):
+    """Return the WKB of a polygon from its closed rings of (n, 2) coordinates."""
+    wkb = [struct.pack('<BII', 1, ogr.wkbPolygon, len(rings))]
+    for ring in rings:
+        wkb.append(struct.pack('<I', len(ring)))
+        wkb.append(ring.astype('<f8').tobytes())
+    return b''.join(wkb)
+
+
+def simplify(polygons, tolerance):
+    """Simplify OGR polygons as a coverage; return the polygons, None if collapsed.
+
+    A polygon whose exterior ring collapses is None; collapsed interior
+    rings are dropped.
+    """
+
+    rings = []
+    counts = []
+    for polygon in polygons:
+        counts.append(polygon.GetGeometryCount())
+        for i in range(polygon.GetGeometryCount()):
+            ring = polygon.GetGeometryRef(i).GetPoints()
+            rings.append(np.array(ring, dtype=float)[:-1, :2])
+
+    simplified = iter(simplify_rings(rings, tolerance))
+    result = []
+    for count in counts:
+        polygon_rings = [next(simplified) for _ in range(count)]
+        if not polygon_rings or polygon_rings[0] is None:
+            result.append(None)
+            continue
+        polygon_rings = [ring for ring in polygon_rings if ring is not None]
+        result.append(ogr.CreateGeometryFromWkb(polygon_wkb(polygon_rings)))
+
+    return result
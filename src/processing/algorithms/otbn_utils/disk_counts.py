@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : disk_counts.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import threading
+
+import numpy as np
+from scipy import fft, signal
+
+from otbn.processing.algorithms.otbn_utils.scratch import InMemory
+
+
+# Kernels with up to this many taps are summed directly, larger ones
+# go through the FFT (one shifted uint16 sum per tap costs about as
+# much as a float32 product and inverse transform at ~70 taps)
+_DIRECT_MAX_TAPS = 64
+
+# Threads for scipy.fft, the tile pool sets 1 in its worker processes
+FFT_WORKERS = -1
+
+
+def _counts_name(C):
+    """Return the intermediate name of the counts under C (M2x for C2)."""
+    return f'M{(C.shape[0] - 1) // 2}x'
+
+
+class ConvolveCounter:
+    """Count the pixels of a mask under a kernel with scipy.signal.convolve."""
+
+    def __init__(self, M, max_radius, scratch=None):
+        self.M = M
+        self.scratch = scratch or InMemory()
+
+    def count(self, C):
+        """Return the number of set pixels of the mask under C at each pixel."""
+        return self.scratch.keep(
+            _counts_name(C),
+            signal.convolve(self.M, C, mode='same'))
+
+
+class SpectrumCounter:
+    """Count the pixels of a mask under several kernels, sharing its FFT.
+
+    The mask is transformed once, padded for kernels up to max_radius,
+    and its spectrum is reused for every kernel counted by FFT. Small
+    kernels are summed directly. Counts are returned as uint16, with
+    float32 transforms only. count() may be called from several
+    threads at once.
+    """
+
+    def __init__(self, M, max_radius, scratch=None):
+        self.M = M
+        self.scratch = scratch or InMemory()
+        k = 2 * max_radius + 1
+        self._shape = tuple(fft.next_fast_len(n + k - 1, real=True) for n in M.shape)
+        self._spectrum = None
+        self._lock = threading.Lock()
+
+    def _mask_spectrum(self):
+        with self._lock:
+            if self._spectrum is None:
+                self._spectrum = self.scratch.keep('M1_espectro', fft.rfft2(
+                    self.M.astype(np.float32), self._shape, workers=FFT_WORKERS))
+        return self._spectrum
+
+    def count(self, C):
+        """Return the number of set pixels of the mask under C at each pixel."""
+
+        if np.count_nonzero(C) <= _DIRECT_MAX_TAPS:
+            return direct_count(self.M, C, self.scratch)
+
+        kernel_spectrum = fft.rfft2(C.astype(np.float32), self._shape, workers=FFT_WORKERS)
+        full = fft.irfft2(
+            self._mask_spectrum() * kernel_spectrum, self._shape, workers=FFT_WORKERS)
+
+        # Crop the 'same' window out of the full convolution
+        r0 = (C.shape[0] - 1) // 2
+        c0 = (C.shape[1] - 1) // 2
+        h, w = self.M.shape
+        same = full[r0:r0+h, c0:c0+w]
+
+        out = self.scratch.zeros(_counts_name(C), same.shape, np.uint16)
+        np.rint(same, out=out, casting='unsafe')
+
+        return out
+
+
+class SpanCounter:
+    """Count the pixels of a mask under disk kernels with row prefix sums.
+
+    A disk is a stack of horizontal runs, each one summed from the
+    row-wise cumulative sums of the mask with two lookups. Counting a
+    disk that contains the previously counted one, as when going from
+    radius r to r+1, only adds the runs the larger disk grows by.
+    Counts are exact uint16; the prefix sums wrap around in uint16,
+    which leaves the differences of two of them unchanged. count() may
+    be called from several threads at once, each call then reuses
+    whichever smaller disk has been completed.
+    """
+
+    def __init__(self, M, max_radius, scratch=None):
+        self.M = M
+        self.scratch = scratch or InMemory()
+        p = max_radius
+        h, w = M.shape
+
+        # Prefix sums of M padded with p zero rows and columns per side,
+        # with a leading zero column: P[y, b+1] - P[y, a] sums columns a..b
+        self._P = self.scratch.zeros(
+            'M1_prefijas', (h + 2*p, w + 2*p + 1), np.uint16)
+        np.cumsum(
+            M, axis=1, dtype=np.uint16,
+            out=self._P[p:p+h, p+1:p+w+1])
+        self._P[p:p+h, p+w+1:] = self._P[p:p+h, p+w:p+w+1]
+        self._pad = p
+        self._last = None
+
+    def _add_run(self, out, dy, lo, hi):
+        """Add to out the sums of the run lo..hi on row offset dy."""
+        h, w = self.M.shape
+        rows = self._P[self._pad+dy:self._pad+dy+h]
+        out += rows[:, self._pad+hi+1:self._pad+hi+1+w]
+        out -= rows[:, self._pad+lo:self._pad+lo+w]
+
+    def count(self, C):
+        """Return the number of set pixels of the mask under C at each pixel."""
+
+        spans = kernel_spans(C)
+        if spans is None:
+            return direct_count(self.M, C, self.scratch)
+
+        # Read once, other threads may replace it meanwhile
+        last = self._last
+        if last is not None and _contains(spans, last[0]):
+            last_spans, last_counts = last
+            out = self.scratch.zeros(_counts_name(C), self.M.shape, np.uint16)
+            out[...] = last_counts
+            for dy, (lo, hi) in spans.items():
+                if dy not in last_spans:
+                    self._add_run(out, dy, lo, hi)
+                    continue
+                last_lo, last_hi = last_spans[dy]
+                if lo < last_lo:
+                    self._add_run(out, dy, lo, last_lo - 1)
+                if hi > last_hi:
+                    self._add_run(out, dy, last_hi + 1, hi)
+        else:
+            out = self.scratch.zeros(_counts_name(C), self.M.shape, np.uint16)
+            for dy, (lo, hi) in spans.items():
+                self._add_run(out, dy, lo, hi)
+
+        self._last = (spans, out)
+
+        return out
+
+
+def kernel_spans(C):
+    """Return {dy: (lo, hi)} with the run of each row of C, or None.
+
+    Offsets are relative to the kernel center. None is returned when a
+    row of C is not a single contiguous run.
+    """
+
+    r0 = (C.shape[0] - 1) // 2
+    c0 = (C.shape[1] - 1) // 2
+    spans = {}
+
+    for i, row in enumerate(C):
+        cols = np.flatnonzero(row)
+        if cols.size == 0:
+            continue
+        if cols[-1] - cols[0] + 1 != cols.size:
+            return None
+        # Kernels are symmetric, so rows and columns need no flipping
+        spans[i - r0] = (cols[0] - c0, cols[-1] - c0)
+
+    return spans
+
+
+def _contains(spans, inner):
+    """Return True if every run of inner lies within a run of spans."""
+
+    for dy, (lo, hi) in inner.items():
+        if dy not in spans:
+            return False
+        if spans[dy][0] > lo or spans[dy][1] < hi:
+            return False
+
+    return True
+
+
+def shift_slices(shape, dy, dx):
+    """Return (dst, src) slices to read an array shifted by (dy, dx).
+
+    dst[y, x] takes src[y+dy, x+dx]; both are empty if the shift
+    leaves no overlap.
+    """
+
+    h, w = shape
+    dy = max(-h, min(h, dy))
+    dx = max(-w, min(w, dx))
+    dst = (slice(max(0, -dy), h - max(0, dy)), slice(max(0, -dx), w - max(0, dx)))
+    src = (slice(max(0, dy), h - max(0, -dy)), slice(max(0, dx), w - max(0, -dx)))
+
+    return dst, src
+
+
+def direct_count(M, C, scratch=None):
+    """Return the uint16 counts of M under C, summing one shifted view per tap."""
+
+    r0 = (C.shape[0] - 1) // 2
+    c0 = (C.shape[1] - 1) // 2
+    out = (scratch or InMemory()).zeros(_counts_name(C), M.shape, np.uint16)
+    M = M.view(np.uint8) if M.dtype == bool else M
+
+    for i, j in zip(*np.nonzero(C)):
+        # Kernels are symmetric, the tap (i, j) reads M at an offset (dy, dx)
+        dst, src = shift_slices(M.shape, r0 - i, c0 - j)
+        out[dst] += M[src]
+
+    return out
+
+
+COUNTERS = {
+    'convolve': ConvolveCounter,
+    'fft': SpectrumCounter,
+    'spans': SpanCounter
+}
+
+
+def counter(M, max_radius, method, scratch=None):
+    """Return a counter of the given method for the mask M.
+
+    scratch (see the scratch module) allocates the counts and the
+    counter's own full-size arrays; in RAM by default.
+    """
+    return COUNTERS[method](M, max_radius, scratch)
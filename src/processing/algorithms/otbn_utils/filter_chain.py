@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : filter_chain.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from otbn.processing.algorithms.otbn_utils import (
+    binary_morphology,
+    disk_counts
+)
+from otbn.processing.algorithms.otbn_utils.scratch import InMemory
+
+
+# Pixels of context an output pixel depends on: the radius 5 count,
+# then the C1 (M8), C3 (M10), C3 (M11) and C1 (MAdy) kernels chained
+# after it. Tiles read with this halo give the single-array result.
+HALO = 5 + 1 + 3 + 3 + 1
+
+
+def make_circle(r):
+    """Return the disk kernel of radius r."""
+    C = np.zeros([2*r+1,2*r+1],dtype=np.byte)
+    for i in range(r):
+        for j in range(r):
+            if np.sqrt((i+1)*(i+1)+(j+1)*(j+1))<=r+0.4:
+                C[r-i-1,r-j-1]=1
+                C[r-i-1,r+j+1]=1
+                C[r+i+1,r-j-1]=1
+                C[r+i+1,r+j+1]=1
+    for i in range(r):
+        C[r,r-i-1]=1
+        C[r,r+i+1]=1
+        C[r+i+1,r]=1
+        C[r-i-1,r]=1
+    C[r,r]=1
+    return C
+
+
+C1 = make_circle(1)
+C2 = make_circle(2)
+C3 = make_circle(3)
+C4 = make_circle(4)
+C5 = make_circle(5)
+
+
+def class_masks(R, clases_sets):
+    """Return the boolean mask of the pixels of R in each set of classes.
+
+    Integer rasters are classified with a single lookup-table pass
+    that codes set k as bit k, whatever the number of sets and classes.
+    """
+
+    if not np.issubdtype(R.dtype, np.integer):
+        return [np.logical_or.reduce([R == x for x in clases]) for clases in clases_sets]
+
+    # Classes outside the data type can not be in R
+    info = np.iinfo(R.dtype)
+    clases_sets = [
+        [x for x in clases if info.min <= x <= info.max]
+        for clases in clases_sets]
+    values = [x for clases in clases_sets for x in clases]
+    if not values:
+        return [np.zeros(R.shape, dtype=bool) for _ in clases_sets]
+    lo = min(values)
+    hi = max(values)
+
+    if hi - lo > 2**16:
+        # A table spanning such sparse classes would be larger than R
+        return [np.isin(R, np.asarray(clases, dtype=R.dtype)) for clases in clases_sets]
+
+    lut = np.zeros(hi - lo + 1, dtype=np.min_scalar_type(2**len(clases_sets) - 1))
+    for k, clases in enumerate(clases_sets):
+        lut[[x - lo for x in clases]] |= 1 << k
+
+    if R.dtype.itemsize <= 2:
+        # Index a table covering every value of the data type directly,
+        # signed values through their unsigned bit pattern
+        v = np.arange(lo, hi + 1)
+        full = np.zeros(2**(8*R.dtype.itemsize), dtype=lut.dtype)
+        full[v % full.size] = lut[v - lo]
+        codes = full[R.view(f'u{R.dtype.itemsize}')]
+    else:
+        inside = (R >= lo) & (R <= hi)
+        codes = lut[np.clip(R, lo, hi) - R.dtype.type(lo)]
+        codes[~inside] = 0
+
+    return [(codes & (1 << k)).astype(bool) for k in range(len(clases_sets))]
+
+
+def mask(R, clases):
+    """Return the boolean mask M1 of the pixels of R in clases."""
+    return class_masks(R, [clases])[0]
+
+
+def counts(R, clases, counter='fft'):
+    """Return M1 bit-packed and its counts under C2 to C5.
+
+    The counts are stacked in a (4, rows, cols) uint8 array, they only
+    depend on R and clases and can be reused for any percentages with
+    from_counts.
+    """
+
+    M1 = mask(R, clases)
+    M1c = disk_counts.counter(M1, 5, counter)
+    Mx = np.empty((4,) + M1.shape, dtype=np.uint8)
+    for i, C in enumerate((C2, C3, C4, C5)):
+        Mx[i] = M1c.count(C)
+
+    return binary_morphology.pack(M1), Mx
+
+
+def from_counts(M1p, Mx, percents, m11bool, madybool):
+    """Return M11 from the output of counts for the given percentages."""
+
+    width = Mx.shape[2]
+    M7 = np.zeros_like(M1p)
+    for Mix, C, p in zip(Mx, (C2, C3, C4, C5), percents):
+        M7 |= binary_morphology.pack(Mix>(C.sum()*p/100))
+
+    return _smooth(M1p, M7, width, m11bool, madybool)
+
+
+def _smooth(M1p, M7, width, m11bool, madybool, scratch=None):
+    """Run the chain from M7 on and return M11 unpacked."""
+
+    keep = (scratch or InMemory()).keep
+
+    M8=keep('M8', binary_morphology.dilate(M7, C1, width)&M1p, width)
+    M9=keep('M9', M7|M8, width)
+
+    # Suavizado final
+    if m11bool:
+        M10=keep('M10', binary_morphology.dilate(M9, C3, width), width)
+        M11=keep('M11', binary_morphology.erode(M10, C3, width), width)
+    else:
+        M11=M9
+
+    # Absorber pixeles adyacentes
+    if madybool:
+        MAdy=keep('MAdy', binary_morphology.dilate(M11, C1, width)&M1p, width)
+        M11=M11|MAdy
+
+    return binary_morphology.unpack(M11, width)
+
+
+def filter_mask(M1, percents, m11bool, madybool, counter='fft', scratch=None, threads=1):
+    """Filter the class mask M1 and return the boolean mask M11.
+
+    percents holds the coverage percentages (M2P, M3P, M4P, M5P) for
+    the radius 2 to 5 filters, and counter the disk_counts method used
+    to count neighbours. The C1 and C3 steps are binary morphology on
+    bit-packed masks, only the counters see M1 unpacked. With a
+    scratch.MemmapScratch, every intermediate is kept in its own
+    memmap file instead of in RAM. With threads > 1, the four radius
+    filters run concurrently on a thread pool.
+    """
+
+    m2p, m3p, m4p, m5p = percents
+    pack = binary_morphology.pack
+    keep = (scratch or InMemory()).keep
+    width = M1.shape[1]
+    M1 = keep('M1', M1)
+    M1p = keep('M1p', pack(M1), width)
+
+    # Filtrados, los cuatro radios comparten el contador de M1 y cada
+    # conteo se descarta apenas se compara con su umbral
+    M1c = disk_counts.counter(M1, 5, counter, scratch)
+    del M1
+
+    def filtrado(C, p, name):
+        return keep(name, pack(M1c.count(C)>(C.sum()*p/100)), width)
+
+    radios = [(C2, m2p, 'M2'), (C3, m3p, 'M3'), (C4, m4p, 'M4'), (C5, m5p, 'M5')]
+    if threads > 1:
+        # Los radios son independientes, y NumPy/SciPy liberan el GIL
+        # en sus operaciones pesadas
+        with ThreadPoolExecutor(max_workers=min(threads, 4)) as executor:
+            M2, M3, M4, M5 = executor.map(lambda radio: filtrado(*radio), radios)
+    else:
+        M2, M3, M4, M5 = [filtrado(*radio) for radio in radios]
+    del M1c
+
+    # M6 = M2 + 2*M3 + 4*M4 + 8*M5 solo se usaba como M6 > 0
+    M7=keep('M7', M2|M3|M4|M5, width)
+
+    return _smooth(M1p, M7, width, m11bool, madybool, scratch)
+
+
+def run(R, clases, percents, m11bool, madybool, counter='fft', scratch=None, threads=1):
+    """Filter a classification array and return the boolean mask M11.
+
+    See filter_mask for the arguments.
+    """
+    return filter_mask(
+        mask(R, clases), percents, m11bool, madybool, counter, scratch, threads)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : mosaic.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+from osgeo import gdal
+
+
+def build_vrt(sources, vrt_file):
+    """Write a VRT mosaic of the raster files in sources to vrt_file.
+
+    Only the index of the sources is written, no pixels are copied.
+    Reads of the VRT open a source only when the window touches it.
+    """
+
+    vrt = gdal.BuildVRT(vrt_file, sources)
+    if vrt is None:
+        raise RuntimeError(gdal.GetLastErrorMsg())
+    vrt = None
+
+
+def pool_config(max_open):
+    """Return the GDAL options bounding the datasets a VRT keeps open."""
+    return {'GDAL_MAX_DATASET_POOL_SIZE': str(max_open)}
+
+
+def set_config(config):
+    """Set the GDAL config options, returning their previous values."""
+
+    previous = {}
+    for key, value in config.items():
+        previous[key] = gdal.GetConfigOption(key)
+        gdal.SetConfigOption(key, value)
+
+    return previous
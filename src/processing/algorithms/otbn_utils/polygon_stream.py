@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : polygon_stream.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+from osgeo import gdal, ogr, osr
+from qgis.core import QgsGeometry
+
+from otbn.processing.algorithms.otbn_utils import coverage_simplify
+
+
+LAYER_NAME = 'poligonos'
+
+# Features written per transaction by write_polygons
+BATCH_SIZE = 10000
+
+# Transactions of polygonize, evenly spread along its progress
+BATCHES = 20
+
+# Features simplified together by coverage_simplify_features
+COVERAGE_CHUNK = 10000
+
+
+def _create_layer(output_file, srs):
+    """Create a GeoPackage with a polygon layer with a class field.
+
+    Returns (datasource, layer).
+    """
+
+    ogr_ds = ogr.GetDriverByName('GPKG').CreateDataSource(output_file)
+    layer = ogr_ds.CreateLayer(LAYER_NAME, srs=srs, geom_type=ogr.wkbPolygon)
+    layer.CreateField(ogr.FieldDefn('class', ogr.OFTInteger))
+
+    return ogr_ds, layer
+
+
+def polygonize(source, output_file, feedback=None):
+    """Polygonize band 1 of source into a GeoPackage layer with a class field.
+
+    Runs gdal.Polygonize in-process, with 4-connectivity and the band
+    mask, as gdal:polygonize does. The features are committed every
+    1/BATCHES of the progress, as gdal.Polygonize writes them in a
+    single call. Returns False if canceled or if GDAL fails; the
+    caller tells them apart with feedback.isCanceled().
+    """
+
+    dataset = gdal.Open(source)
+    band = dataset.GetRasterBand(1)
+
+    srs = None
+    if dataset.GetProjection():
+        srs = osr.SpatialReference(wkt=dataset.GetProjection())
+
+    ogr_ds, layer = _create_layer(output_file, srs)
+
+    committed = [0]
+
+    def progress(complete, message, data):
+        # Commit the features written so far and open a new transaction
+        if int(complete * BATCHES) > committed[0]:
+            committed[0] = int(complete * BATCHES)
+            layer.CommitTransaction()
+            layer.StartTransaction()
+        if feedback is None:
+            return 1
+        feedback.setProgress(100 * complete)
+        return 0 if feedback.isCanceled() else 1
+
+    layer.StartTransaction()
+    result = gdal.Polygonize(band, band.GetMaskBand(), layer, 0, [], callback=progress)
+    layer.CommitTransaction()
+    ogr_ds = None
+
+    return result == gdal.CE_None
+
+
+def write_polygons(polygons, output_file, srs_wkt=None, feedback=None):
+    """Write (class, wkb) pairs into a GeoPackage layer with a class field.
+
+    Features are committed every BATCH_SIZE, so memory does not grow
+    with the number of polygons. Returns False if canceled.
+    """
+
+    srs = None
+    if srs_wkt:
+        srs = osr.SpatialReference(wkt=srs_wkt)
+
+    ogr_ds, layer = _create_layer(output_file, srs)
+    definition = layer.GetLayerDefn()
+
+    count = 0
+    layer.StartTransaction()
+    for cls, wkb in polygons:
+        feature = ogr.Feature(definition)
+        feature.SetField('class', int(cls))
+        feature.SetGeometryDirectly(ogr.CreateGeometryFromWkb(wkb))
+        layer.CreateFeature(feature)
+        count += 1
+        if count % BATCH_SIZE == 0:
+            layer.CommitTransaction()
+            layer.StartTransaction()
+    layer.CommitTransaction()
+    ogr_ds = None
+
+    return feedback is None or not feedback.isCanceled()
+
+
+def simplify_features(features, tolerance, source_area=False):
+    """Yield (class, area, geometry) of the features once simplified.
+
+    Simplifies as ST_Simplify does (Douglas-Peucker through GEOS, not
+    preserving topology), one feature at a time. area is the area of
+    the feature before simplification if source_area, else None.
+    Features that collapse are dropped.
+    """
+
+    for feature in features:
+        geometry = _ogr_geometry(feature)
+        area = geometry.Area() if source_area else None
+        yield from _converted(feature['class'], area, geometry.Simplify(tolerance))
+
+
+def coverage_simplify_features(features, tolerance, source_area=False):
+    """Yield (class, area, geometry) of the features once simplified.
+
+    As simplify_features, but the features are simplified together as
+    a coverage (see coverage_simplify), so boundaries shared by several
+    polygons are simplified once and stay shared. After the hole merge
+    the class-1 polygons share corner points only, not edges: those
+    are kept fixed, and there is no shared edge to save work on. The
+    features are taken COVERAGE_CHUNK at a time, so memory does not
+    grow with the number of polygons; points shared across chunks are
+    not kept fixed.
+    """
+
+    chunk = []
+    for feature in features:
+        chunk.append(feature)
+        if len(chunk) == COVERAGE_CHUNK:
+            yield from _coverage_simplify_chunk(chunk, tolerance, source_area)
+            chunk = []
+    yield from _coverage_simplify_chunk(chunk, tolerance, source_area)
+
+
+def _coverage_simplify_chunk(features, tolerance, source_area):
+    classes = []
+    areas = []
+    polygons = []
+    for feature in features:
+        geometry = _ogr_geometry(feature)
+        classes.append(feature['class'])
+        areas.append(geometry.Area() if source_area else None)
+        polygons.append(geometry)
+
+    simplified = coverage_simplify.simplify(polygons, tolerance)
+    for cls, area, geometry in zip(classes, areas, simplified):
+        yield from _converted(cls, area, geometry)
+
+
+def wkb_geometries(simplified):
+    """Yield (class, area, geometry) for (class, area, wkb) triples.
+
+    Converts the output of staircase.Smoother, whose module is kept
+    free of qgis for its workers. Closing this generator closes
+    simplified.
+    """
+
+    try:
+        for cls, area, wkb in simplified:
+            geometry = QgsGeometry()
+            geometry.fromWkb(wkb)
+            yield cls, area, geometry
+    finally:
+        simplified.close()
+
+
+def _ogr_geometry(feature):
+    return ogr.CreateGeometryFromWkb(bytes(feature.geometry().asWkb()))
+
+
+def _converted(cls, area, simplified):
+    """Yield (cls, area, geometry) for a simplified OGR geometry, unless it collapsed."""
+
+    if simplified is None or simplified.IsEmpty():
+        return
+    result = QgsGeometry()
+    result.fromWkb(bytes(simplified.ExportToWkb()))
+    yield cls, area, result
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : raster_output.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import numpy as np
+from osgeo import gdal
+
+
+# 1-bit, tiled and compressed; blocks never written stay empty
+GTIFF_OPTIONS = [
+    'NBITS=1',
+    'TILED=YES',
+    'BLOCKXSIZE=512',
+    'BLOCKYSIZE=512',
+    'COMPRESS=DEFLATE',
+    'SPARSE_OK=TRUE'
+]
+
+COG_OPTIONS = [
+    'BLOCKSIZE=512',
+    'COMPRESS=DEFLATE',
+    'SPARSE_OK=TRUE'
+]
+
+# The majority of a binary mask keeps it binary at every level
+OVERVIEW_RESAMPLING = 'MODE'
+
+# Smallest overview, in pixels along the largest side
+OVERVIEW_MIN_SIZE = 256
+
+
+def overview_levels(xsize, ysize):
+    """Return the decimation factors of the overviews of a raster."""
+
+    levels = []
+    level = 2
+    while max(xsize, ysize) / level >= OVERVIEW_MIN_SIZE:
+        levels.append(level)
+        level *= 2
+
+    return levels
+
+
+def valid_mask(R, nodata):
+    """Return the boolean mask of the pixels of R that are not nodata, or None."""
+
+    if nodata is None:
+        return None
+    if np.isnan(nodata):
+        return ~np.isnan(R)
+
+    return R != nodata
+
+
+class MaskWriter:
+    """Streaming writer of a binary mask raster shaped like a source band.
+
+    Tiles are written as they are produced. GeoTIFF outputs are 1-bit,
+    tiled, DEFLATE compressed and sparse; with cog, they are written to
+    a temporary file and copied to a Cloud Optimized GeoTIFF on close.
+    The nodata pixels of the source are kept as a per-dataset mask.
+    With update, an existing output is opened and the tiles written
+    replace its blocks in place. With overviews, MODE overviews are
+    built on close (by the COG driver for a COG).
+    """
+
+    def __init__(self, output_file, output_format, dataset, band, cog=False, update=False,
+                 overviews=False):
+        self.output_file = output_file
+        self.cog = cog and output_format == 'GTiff' and not update
+        self.update = update
+        self.overviews = overviews
+
+        if update:
+            self._path = output_file
+            self.dst_ds = gdal.Open(output_file, gdal.GA_Update)
+            self.dst_band = self.dst_ds.GetRasterBand(1)
+            self.mask_band = None
+            if self.dst_band.GetMaskFlags() & gdal.GMF_PER_DATASET:
+                self.mask_band = self.dst_band.GetMaskBand()
+            return
+
+        if output_format == 'GTiff':
+            options = GTIFF_OPTIONS
+        else:
+            options = []
+
+        if self.cog:
+            self._path = output_file + '.tmp.tif'
+        else:
+            self._path = output_file
+
+        driver = gdal.GetDriverByName(output_format)
+        self.dst_ds = driver.Create(self._path,
+                       band.XSize,
+                       band.YSize,
+                       1,
+                       gdal.GDT_Byte,
+                       options=options)
+        self.dst_ds.SetGeoTransform(dataset.GetGeoTransform())
+        self.dst_ds.SetProjection(dataset.GetProjection())
+        self.dst_band = self.dst_ds.GetRasterBand(1)
+
+        self.mask_band = None
+        if band.GetNoDataValue() is not None:
+            self.dst_ds.CreateMaskBand(gdal.GMF_PER_DATASET)
+            self.mask_band = self.dst_band.GetMaskBand()
+
+    def write(self, tile, M11, valid=None):
+        """Write the boolean output of a tile, and its valid pixels if any.
+
+        An M11 of None is an empty tile, left unwritten: sparse GeoTIFF
+        blocks and new rasters of other drivers read as 0. When updating,
+        the previous content of the tile is cleared instead.
+        """
+
+        if M11 is None and self.update:
+            M11 = np.zeros((tile.ysize, tile.xsize), dtype=bool)
+        if M11 is not None:
+            self.dst_band.WriteArray(M11.view(np.uint8), tile.xoff, tile.yoff)
+        if self.mask_band is not None and valid is not None:
+            self.mask_band.WriteArray(valid.view(np.uint8) * np.uint8(255), tile.xoff, tile.yoff)
+
+    def close(self, finish=True):
+        """Flush the output, build its overviews and copy it to a COG if requested.
+
+        Without finish, as on cancel, the output is only released: no
+        overviews are built and no COG is copied.
+        """
+
+        if finish and self.overviews and not self.cog:
+            # Rebuilt over the whole raster, also after an update
+            levels = overview_levels(self.dst_ds.RasterXSize, self.dst_ds.RasterYSize)
+            if levels:
+                self.dst_ds.BuildOverviews(OVERVIEW_RESAMPLING, levels)
+
+        self.mask_band = None
+        self.dst_band = None
+        self.dst_ds = None
+
+        if self.cog and not finish:
+            gdal.GetDriverByName('GTiff').Delete(self._path)
+        elif self.cog:
+            src_ds = gdal.Open(self._path)
+            if self.overviews:
+                options = COG_OPTIONS + [f'OVERVIEW_RESAMPLING={OVERVIEW_RESAMPLING}']
+            else:
+                options = COG_OPTIONS + ['OVERVIEWS=NONE']
+            gdal.GetDriverByName('COG').CreateCopy(
+                self.output_file,
+                src_ds,
+                options=options)
+            src_ds = None
+            gdal.GetDriverByName('GTiff').Delete(self._path)
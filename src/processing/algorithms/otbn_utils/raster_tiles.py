@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : raster_tiles.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+from collections import namedtuple
+
+
+class Tile(namedtuple('Tile', [
+                    'xoff', 'yoff', 'xsize', 'ysize',
+                    'read_xoff', 'read_yoff', 'read_xsize', 'read_ysize'])):
+    """Output window of a raster plus the haloed window to read for it."""
+
+    __slots__ = ()
+
+    @property
+    def read_window(self):
+        """Return the haloed window as (xoff, yoff, xsize, ysize)."""
+        return (self.read_xoff, self.read_yoff,
+                self.read_xsize, self.read_ysize)
+
+    @property
+    def inner(self):
+        """Return the slices of the output window inside the read window."""
+        y0 = self.yoff - self.read_yoff
+        x0 = self.xoff - self.read_xoff
+        return (slice(y0, y0 + self.ysize), slice(x0, x0 + self.xsize))
+
+
+def _align(size, block, total):
+    """Round a tile size to a multiple of the raster block size."""
+
+    # Striped rasters (one block spanning the whole dimension) are
+    # read in partial windows, aligning would load the whole strip
+    if block >= total:
+        return min(size, total)
+
+    n = max(1, round(size / block))
+
+    return min(n * block, total)
+
+
+def tiles(xsize, ysize, tile_size, block_size, halo):
+    """Yield the block-aligned tiles of a raster with a halo around them.
+
+    A tile_size of 0 yields one tile covering the whole raster.
+    Read windows are clipped to the raster extent, so a filter applied
+    to them sees the same zero padding at the raster borders as when
+    applied to the full array.
+    """
+
+    if tile_size <= 0:
+        tile_x, tile_y = xsize, ysize
+    else:
+        tile_x = _align(tile_size, block_size[0], xsize)
+        tile_y = _align(tile_size, block_size[1], ysize)
+
+    for yoff in range(0, ysize, tile_y):
+        h = min(tile_y, ysize - yoff)
+        read_yoff = max(0, yoff - halo)
+        read_yend = min(ysize, yoff + h + halo)
+        for xoff in range(0, xsize, tile_x):
+            w = min(tile_x, xsize - xoff)
+            read_xoff = max(0, xoff - halo)
+            read_xend = min(xsize, xoff + w + halo)
+            yield Tile(
+                xoff, yoff, w, h,
+                read_xoff, read_yoff,
+                read_xend - read_xoff, read_yend - read_yoff)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : ring_pruning.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+from qgis.core import (
+    QgsFeatureRequest,
+    QgsGeometry,
+    QgsPolygon,
+    QgsSpatialIndex
+)
+
+
+def _ring_key(ring):
+    """Return a key matching the two sides of a boundary shared by polygons.
+
+    gdal:polygonize writes the same coordinates on both sides of a
+    boundary, but not from the same starting vertex nor orientation.
+    """
+
+    polygon = QgsPolygon()
+    polygon.setExteriorRing(ring.clone())
+    bbox = ring.boundingBox()
+
+    return (
+        bbox.xMinimum(),
+        bbox.yMinimum(),
+        bbox.xMaximum(),
+        bbox.yMaximum(),
+        round(polygon.area(), 3))
+
+
+def _interior_keys(polygon):
+    return [_ring_key(polygon.interiorRing(i)) for i in range(polygon.numInteriorRings())]
+
+
+class _UnionFind:
+    """Disjoint sets of hashable items."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def _pruned(geometry, drop, add):
+    """Return geometry without the interior rings keyed in drop, plus the rings in add."""
+
+    polygon = geometry.constGet().clone()
+    for i in reversed(range(polygon.numInteriorRings())):
+        if _ring_key(polygon.interiorRing(i)) in drop:
+            polygon.removeInteriorRing(i)
+    for ring in add:
+        polygon.addInteriorRing(ring.clone())
+
+    return QgsGeometry(polygon)
+
+
+def merge_holes(layer, max_area, feedback=None):
+    """Yield the class-1 polygons of layer with its class-0 holes of up to max_area.
+
+    The output is the singlepart union of the class-1 polygons and the
+    class-0 polygons of up to max_area of a polygonized raster, without
+    building that union. A small hole whose outer boundary is an
+    interior ring of a single class-1 polygon, and that shares no edge
+    with any other class-1 polygon, is merged by dropping that ring.
+    The other small holes are unioned only with the class-1 polygons
+    they share edges with.
+    """
+
+    ones = QgsFeatureRequest().setFilterExpression('"class" = 1')
+    zeros = QgsFeatureRequest().setFilterExpression('"class" = 0')
+
+    # One pass over the class-1 polygons: the spatial index, and the
+    # polygons owning each interior ring
+    index = QgsSpatialIndex()
+    owners = {}
+    for f in layer.getFeatures(ones):
+        if feedback is not None and feedback.isCanceled():
+            return
+        index.addFeature(f)
+        for key in _interior_keys(f.geometry().constGet()):
+            owners.setdefault(key, []).append(f.id())
+
+    def candidates(geometry, exclude):
+        fids = [fid for fid in index.intersects(geometry.boundingBox()) if fid not in exclude]
+        if not fids:
+            return []
+        return list(layer.getFeatures(QgsFeatureRequest().setFilterFids(fids)))
+
+    # Rings to drop from and add to each class-1 polygon
+    drops = {}
+    adds = {}
+    groups = _UnionFind()
+    lone_holes = []
+
+    for hole in layer.getFeatures(zeros):
+        if feedback is not None and feedback.isCanceled():
+            return
+        h = hole.geometry()
+        if h.area() > max_area:
+            continue
+
+        polygon = h.constGet()
+        outer_key = _ring_key(polygon.exteriorRing())
+        engine = QgsGeometry.createGeometryEngine(polygon)
+        engine.prepareGeometry()
+
+        # The polygon whose interior ring is the hole, and any other
+        # class-1 polygon sharing an edge with it (islands inside it,
+        # or neighbours when it is not enclosed)
+        enclosing = owners.get(outer_key, [])
+        others = [
+            f.id() for f in candidates(h, enclosing)
+            if engine.relatePattern(f.geometry().constGet(), '****1****')]
+
+        if enclosing and not others:
+            # Simple case: fill the ring, keeping the holes of the hole
+            fid = enclosing[0]
+            drops.setdefault(fid, set()).add(outer_key)
+            adds.setdefault(fid, []).extend(
+                polygon.interiorRing(i).clone() for i in range(polygon.numInteriorRings()))
+            continue
+
+        neighbours = enclosing + others
+        if not neighbours:
+            lone_holes.append(h)
+            continue
+
+        key = ('hole', hole.id())
+        groups.find(key)
+        for fid in neighbours:
+            groups.union(key, ('one', fid))
+
+    # Lone holes stay polygons of their own, as in the union
+    for h in lone_holes:
+        yield h
+
+    def edited(f):
+        fid = f.id()
+        if fid in drops or fid in adds:
+            return _pruned(f.geometry(), drops.get(fid, set()), adds.get(fid, []))
+        return f.geometry()
+
+    # Class-1 polygons outside groups stream out with their rings pruned
+    members = {}
+    for f in layer.getFeatures(ones):
+        if feedback is not None and feedback.isCanceled():
+            return
+        key = ('one', f.id())
+        if key in groups.parent:
+            members.setdefault(groups.find(key), []).append(edited(f))
+        else:
+            yield edited(f)
+
+    # Localized unions of the holes shared by several polygons
+    hole_fids = [item[1] for item in groups.parent if item[0] == 'hole']
+    if hole_fids:
+        for hole in layer.getFeatures(QgsFeatureRequest().setFilterFids(hole_fids)):
+            members.setdefault(groups.find(('hole', hole.id())), []).append(hole.geometry())
+
+    for geometries in members.values():
+        if feedback is not None and feedback.isCanceled():
+            return
+        union = QgsGeometry.unaryUnion(geometries)
+        for part in union.asGeometryCollection():
+            yield part
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : scratch.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+
+class InMemory:
+    """Keep the intermediates of the filter chain as in-RAM arrays."""
+
+    def zeros(self, name, shape, dtype):
+        """Return a new zeroed array for the intermediate name."""
+        return np.zeros(shape, dtype=dtype)
+
+    def keep(self, name, array, width=None):
+        """Return the array to keep as the intermediate name."""
+        return array
+
+
+class MemmapScratch:
+    """Keep the intermediates of the filter chain in .npy memmap files.
+
+    Each intermediate is written to <directory>/<name>.npy and can be
+    opened afterwards with np.load(path, mmap_mode='r'). index.json
+    records the column count of the bit-packed ones (see
+    binary_morphology.unpack).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def zeros(self, name, shape, dtype):
+        """Return a new zeroed memmap for the intermediate name."""
+        self._set_index(name, {})
+        return np.lib.format.open_memmap(
+            os.path.join(self.directory, f'{name}.npy'),
+            mode='w+',
+            dtype=dtype,
+            shape=shape)
+
+    def keep(self, name, array, width=None):
+        """Copy array to the memmap of the intermediate name and return it.
+
+        An array already kept as name is returned as is.
+        """
+        path = os.path.join(self.directory, f'{name}.npy')
+        if isinstance(array, np.memmap) and array.filename == os.path.abspath(path):
+            return array
+        out = self.zeros(name, array.shape, array.dtype)
+        out[...] = array
+        if width is not None:
+            self._set_index(name, {'packed_width': width})
+        return out
+
+    def _set_index(self, name, entry):
+        # Radius filters may keep their intermediates from several threads
+        with self._lock:
+            self._index[name] = entry
+            with open(os.path.join(self.directory, 'index.json'), 'w') as f:
+                json.dump(self._index, f, indent=1)
+
+
+def open_scratch(directory):
+    """Return a MemmapScratch in directory, or InMemory if it is empty."""
+    if directory:
+        return MemmapScratch(directory)
+    return InMemory()
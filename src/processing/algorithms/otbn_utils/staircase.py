@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : staircase.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait
+)
+
+import numpy as np
+from osgeo import ogr
+
+from otbn.processing.algorithms.otbn_utils import (
+    coverage_simplify,
+    tile_pool
+)
+
+
+def smooth_ring(coords):
+    """Return a ring of pixel edges with its staircase runs collapsed.
+
+    coords holds the vertices of the ring without the closing one. The
+    ring is moved to the midpoints of its edges, where a regular
+    staircase becomes a straight run of points, and the points of each
+    run between its ends are dropped. Returns the closed ring, or None
+    if it collapses.
+    """
+
+    mids = (coords + np.roll(coords, -1, axis=0)) / 2
+
+    # Keep the points where the direction changes
+    before = mids - np.roll(mids, 1, axis=0)
+    after = np.roll(mids, -1, axis=0) - mids
+    cross = before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]
+    scale = np.hypot(*before.T) * np.hypot(*after.T)
+    ring = mids[np.abs(cross) > 1e-9 * scale]
+
+    if len(ring) < 3:
+        return None
+
+    return np.concatenate([ring, ring[:1]])
+
+
+def smooth_polygon(wkb, tolerance):
+    """Return (wkb, vertices before, vertices after) of a smoothed, simplified polygon.
+
+    The wkb is None if the polygon collapses.
+    """
+
+    polygon = ogr.CreateGeometryFromWkb(wkb)
+    before = sum(
+        polygon.GetGeometryRef(i).GetPointCount()
+        for i in range(polygon.GetGeometryCount()))
+
+    rings = []
+    for i in range(polygon.GetGeometryCount()):
+        coords = np.array(polygon.GetGeometryRef(i).GetPoints(), dtype=float)[:-1, :2]
+        ring = smooth_ring(coords)
+        if ring is None:
+            if i == 0:
+                return None, before, 0
+            continue
+        rings.append(ring)
+
+    simplified = ogr.CreateGeometryFromWkb(coverage_simplify.polygon_wkb(rings)).Simplify(tolerance)
+    if simplified is None or simplified.IsEmpty():
+        return None, before, 0
+
+    after = sum(
+        simplified.GetGeometryRef(i).GetPointCount()
+        for i in range(simplified.GetGeometryCount()))
+
+    return bytes(simplified.ExportToWkb()), before, after
+
+
+def smooth_chunk(chunk, tolerance, source_area=False):
+    """Smooth a chunk of (class, wkb) polygons; return (class, area, wkb, before, after) each.
+
+    area is the area of the polygon before smoothing if source_area,
+    else None.
+    """
+
+    result = []
+    for cls, wkb in chunk:
+        area = ogr.CreateGeometryFromWkb(wkb).Area() if source_area else None
+        smoothed, before, after = smooth_polygon(wkb, tolerance)
+        result.append((cls, area, smoothed, before, after))
+
+    return result
+
+
+class Smoother:
+    """Staircase smoothing and simplification of polygons in a process pool.
+
+    This module is imported by the spawned workers, so it depends on
+    numpy and OGR only. Features are sent to the workers in chunks of
+    WKB. The vertex counts before and after are accumulated in
+    vertices_before and vertices_after.
+    """
+
+    def __init__(self, tolerance, workers=1, chunk_size=1000):
+        self.tolerance = tolerance
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.vertices_before = 0
+        self.vertices_after = 0
+
+    def _chunks(self, features):
+        chunk = []
+        for feature in features:
+            chunk.append((feature['class'], bytes(feature.geometry().asWkb())))
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _imap(self, features, source_area):
+        """Yield the smoothed chunks, in completion order."""
+
+        chunks = self._chunks(features)
+        if self.workers <= 1:
+            for chunk in chunks:
+                yield smooth_chunk(chunk, self.tolerance, source_area)
+            return
+
+        with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=tile_pool.pool_context()) as executor:
+            pending = set()
+
+            def submit(n):
+                for chunk in chunks:
+                    pending.add(executor.submit(smooth_chunk, chunk, self.tolerance, source_area))
+                    n -= 1
+                    if n == 0:
+                        break
+
+            try:
+                submit(2 * self.workers)
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield future.result()
+                    submit(len(done))
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def simplify(self, features, source_area=False):
+        """Yield (class, area, wkb) of the features once smoothed.
+
+        As polygon_stream.simplify_features, in the process pool, with
+        the geometries as WKB (see polygon_stream.wkb_geometries).
+        """
+
+        for chunk in self._imap(features, source_area):
+            for cls, area, wkb, before, after in chunk:
+                self.vertices_before += before
+                self.vertices_after += after
+                if wkb is None:
+                    continue
+                yield cls, area, wkb
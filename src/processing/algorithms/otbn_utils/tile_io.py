@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : tile_io.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import queue
+import threading
+
+
+# Sentinel closing the queues
+_DONE = object()
+
+
+def _put(q, item, stop):
+    """Put item in q, giving up if stop is set while q is full."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def prefetch(tiles, read, depth=2):
+    """Yield (tile, read(tile)) for each tile, reading ahead on a thread.
+
+    Up to depth tiles are read while the caller processes the current
+    one. read runs on the reader thread only, so the dataset it reads
+    from must not be used by the caller meanwhile. Errors raised by
+    read are raised here.
+    """
+
+    q = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def reader():
+        try:
+            for tile in tiles:
+                if not _put(q, (tile, read(tile)), stop):
+                    return
+        except Exception as e:
+            _put(q, e, stop)
+            return
+        _put(q, _DONE, stop)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            # Yielded without a reference left here, so the caller can
+            # release the window before processing it
+            box = [item]
+            del item
+            yield box.pop()
+    finally:
+        # The caller stopped early (cancel) or read failed
+        stop.set()
+        thread.join()
+
+
+class BackgroundWriter:
+    """Write tiles through a writer on a background thread.
+
+    Wraps a raster_output.MaskWriter: write() queues the tile and
+    returns, at most depth tiles wait to be written. The wrapped writer
+    is used by the writer thread only, and closed by close(), which
+    raises any error the thread ran into once the output is released.
+    """
+
+    def __init__(self, writer, depth=2):
+        self.writer = writer
+        self._queue = queue.Queue(maxsize=depth)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if self._error is None:
+                try:
+                    self.writer.write(*item)
+                except Exception as e:
+                    # Keep draining so write() never blocks
+                    self._error = e
+
+    def write(self, tile, M11, valid=None):
+        """Queue the output of a tile for writing."""
+        if self._error is not None:
+            raise self._error
+        self._queue.put((tile, M11, valid))
+
+    def close(self, finish=True):
+        """Wait for the queued tiles and close the wrapped writer, see MaskWriter.close."""
+        self._queue.put(_DONE)
+        self._thread.join()
+        try:
+            if self._error is not None:
+                raise self._error
+        finally:
+            # Release the output also after an error, without finishing it
+            self.writer.close(finish and self._error is None)
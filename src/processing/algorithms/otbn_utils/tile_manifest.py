@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : tile_manifest.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import hashlib
+import json
+import os
+
+
+def _tile_key(tile):
+    return '{}_{}_{}_{}'.format(*tile.read_window)
+
+
+class TileManifest:
+    """Content hashes of the input tiles an output raster was filtered from.
+
+    The manifest is kept next to the output. Each tile is hashed over
+    its haloed read window, so a change within the halo of a neighbour
+    also marks the tile as changed. The hashes of a previous run are
+    only used if it had the same params and its output still exists.
+    """
+
+    def __init__(self, output_file, params):
+        self.path = output_file + '.teselas.json'
+        self.params = hashlib.sha1(
+            json.dumps(params).encode('utf-8')).hexdigest()
+        self.hashes = {}
+        self.previous = {}
+
+        if os.path.exists(self.path) and os.path.exists(output_file):
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('params') == self.params:
+                self.previous = data['tiles']
+
+    def changed(self, tile, band):
+        """Hash the read window of tile and return whether it changed."""
+
+        R = band.ReadAsArray(*tile.read_window)
+        key = _tile_key(tile)
+        self.hashes[key] = hashlib.blake2b(
+            R.tobytes(), digest_size=16).hexdigest()
+
+        return self.previous.get(key) != self.hashes[key]
+
+    def save(self):
+        """Write the hashes of this run, replacing the previous manifest."""
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'params': self.params, 'tiles': self.hashes}, f)
+        os.replace(tmp_path, self.path)
+
+    def discard(self):
+        """Remove the manifest, for outputs that are not fully written."""
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
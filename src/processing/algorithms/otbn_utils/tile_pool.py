@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : tile_pool.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait
+)
+
+import numpy as np
+from osgeo import gdal
+
+from otbn.processing.algorithms.otbn_utils import (
+    disk_counts,
+    filter_chain,
+    raster_output,
+    scratch,
+    tile_io
+)
+
+
+# Datasets opened by a worker process, reused across its tiles
+_bands = {}
+
+
+def _python_executable():
+    """Return the Python interpreter to spawn workers with, if not sys.executable."""
+
+    # Inside QGIS sys.executable is the QGIS binary, not a Python one
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return None
+
+    for name in ('python.exe', 'python3.exe', os.path.join('bin', 'python3')):
+        path = os.path.join(sys.exec_prefix, name)
+        if os.path.isfile(path):
+            return path
+
+    return None
+
+
+def pool_context():
+    """Return the multiprocessing context for process pools."""
+
+    # Forking the QGIS process (Qt threads, open datasets) is not safe
+    ctx = multiprocessing.get_context('spawn')
+    executable = _python_executable()
+    if executable:
+        ctx.set_executable(executable)
+
+    return ctx
+
+
+def _init_worker(config):
+    """Keep each worker process on a single FFT thread, and set its GDAL config."""
+    disk_counts.FFT_WORKERS = 1
+    for key, value in config.items():
+        gdal.SetConfigOption(key, value)
+
+
+def _worker_band(source, band_n):
+    """Return the band of a dataset opened by this worker process."""
+
+    key = (source, band_n)
+    if key not in _bands:
+        dataset = gdal.Open(source)
+        _bands[key] = (dataset, dataset.GetRasterBand(band_n))
+
+    return _bands[key][1]
+
+
+def read_tile(band, tile, clases):
+    """Return the haloed window of tile, or None if it holds no data.
+
+    None is returned for windows whose blocks are all empty, read as
+    nodata (or 0), unless that value is one of the classes to extract.
+    """
+
+    fill = band.GetNoDataValue()
+    if (0 if fill is None else fill) not in clases:
+        flags, _ = band.GetDataCoverageStatus(*tile.read_window)
+        if flags == gdal.GDAL_DATA_COVERAGE_STATUS_EMPTY:
+            return None
+
+    return band.ReadAsArray(*tile.read_window)
+
+
+def tile_scratch(tile, options):
+    """Return the scratch of tile, in its own subdirectory of options['scratch']."""
+
+    scratch_dir = options.get('scratch')
+    if scratch_dir:
+        scratch_dir = os.path.join(scratch_dir, f'tesela_{tile.xoff}_{tile.yoff}')
+    return scratch.open_scratch(scratch_dir)
+
+
+def mask_array(R, tile, nodata, options, keeper):
+    """Return (M1, valid) for the haloed window R of tile.
+
+    valid is the packed mask of the pixels that are not nodata, or None
+    if there is no nodata value or R is None (see read_tile). M1 is kept
+    in keeper (see tile_scratch), so the caller can release R before
+    filtering, and is None when the window, halo included, has no
+    pixel of the classes.
+    """
+
+    if R is None:
+        return None, None
+
+    valid = raster_output.valid_mask(R[tile.inner], nodata)
+    if valid is not None:
+        valid = np.packbits(valid, axis=1)
+
+    M1 = filter_chain.mask(R, options['clases'])
+    if not M1.any():
+        return None, valid
+
+    return keeper.keep('M1', M1), valid
+
+
+def filter_masked(M1, tile, valid, options, keeper):
+    """Filter the mask M1 of tile and return its bit-packed output.
+
+    Returns (M11, valid), see mask_array. M11 is None when M1 is: the
+    output is then empty and the filter chain is not run.
+    """
+
+    if M1 is None:
+        return None, valid
+
+    options = dict(options)
+    options.pop('clases')
+    if options.pop('scratch', None):
+        # The FFT and convolve counters hold several full-size float
+        # arrays in RAM, the spans one keeps its prefix sums in scratch
+        options['counter'] = 'spans'
+
+    M11 = filter_chain.filter_mask(M1, scratch=keeper, **options)
+
+    return np.packbits(M11[tile.inner], axis=1), valid
+
+
+def filter_tile(band, tile, options):
+    """Read a haloed tile, filter it and return its bit-packed output."""
+
+    keeper = tile_scratch(tile, options)
+    # No reference to the window is left once it is masked
+    M1, valid = mask_array(
+        read_tile(band, tile, options['clases']),
+        tile,
+        band.GetNoDataValue(),
+        options,
+        keeper)
+    return filter_masked(M1, tile, valid, options, keeper)
+
+
+def _filter_tile_worker(source, band_n, tile, options):
+    """Filter a tile in a worker process."""
+    return (tile,) + filter_tile(_worker_band(source, band_n), tile, options)
+
+
+def unpack(tile, packed):
+    """Return the boolean array of a tile from its packed bits, or None."""
+    if packed is None:
+        return None
+    return np.unpackbits(packed, axis=1, count=tile.xsize).view(bool)
+
+
+def imap(band, source, band_n, tiles, options, workers=1, config=None):
+    """Yield (tile, M11, valid) packed for each tile, in completion order.
+
+    With one worker, tiles are filtered in-process while the next ones
+    are read from band on a reader thread. With more, tiles are
+    filtered in a process pool whose workers read their windows from
+    source directly; at most two tiles per worker are in flight, so
+    results do not pile up ahead of the writer. The GDAL config options
+    of the calling process are not inherited: pass them in config.
+    """
+
+    if workers <= 1:
+        nodata = band.GetNoDataValue()
+        reads = tile_io.prefetch(
+            tiles,
+            lambda tile: read_tile(band, tile, options['clases']))
+        try:
+            for tile, R in reads:
+                keeper = tile_scratch(tile, options)
+                M1, valid = mask_array(R, tile, nodata, options, keeper)
+                # Only the kept M1 is referenced while the chain runs
+                R = None
+                yield (tile,) + filter_masked(M1, tile, valid, options, keeper)
+        finally:
+            reads.close()
+        return
+
+    tiles = iter(tiles)
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=pool_context(),
+            initializer=_init_worker,
+            initargs=(config or {},)) as executor:
+        pending = set()
+
+        def submit(n):
+            for tile in tiles:
+                pending.add(executor.submit(
+                    _filter_tile_worker, source, band_n, tile, options))
+                n -= 1
+                if n == 0:
+                    break
+
+        try:
+            submit(2 * workers)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+                submit(len(done))
+        finally:
+            # Stop queued tiles if the caller stops iterating (cancel)
+            for future in pending:
+                future.cancel()
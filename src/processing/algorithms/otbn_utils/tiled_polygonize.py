@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+************************************************************************
+    Name                : tiled_polygonize.py
+    Date                : October 2026
+    Copyright           : (C) 2026 by Gabriel De Luca
+    Email               : caprieldeluca@gmail.com
+************************************************************************
+  This program is free software: you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation, either version 3 of the License, or
+  (at your option) any later version.
+************************************************************************
+"""
+
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait
+)
+
+from osgeo import gdal, ogr
+
+from otbn.processing.algorithms.otbn_utils import (
+    raster_tiles,
+    tile_pool
+)
+
+
+# Datasets opened by a spawned worker process, reused across its tiles
+_bands = {}
+
+
+def _worker_band(source, band_n):
+    """Return the band of a dataset opened by this worker process."""
+
+    key = (source, band_n)
+    if key not in _bands:
+        dataset = gdal.Open(source)
+        _bands[key] = (dataset, dataset.GetRasterBand(band_n))
+
+    return _bands[key][1]
+
+
+def _memory_driver():
+    # The vector Memory driver is merged into MEM since GDAL 3.11
+    return ogr.GetDriverByName('Memory') or ogr.GetDriverByName('MEM')
+
+
+def polygonize_tile(band, tile):
+    """Polygonize a tile of band, in pixel coordinates of the whole raster.
+
+    Returns a list of (class, wkb, seam), seam being whether the polygon
+    reaches an edge of the tile shared with another tile. Pixel
+    coordinates are integers, so both sides of a seam match exactly.
+    """
+
+    R = band.ReadAsArray(*tile.read_window)
+    valid = band.GetMaskBand().ReadAsArray(*tile.read_window)
+
+    mem_ds = gdal.GetDriverByName('MEM').Create('', tile.xsize, tile.ysize, 2, gdal.GDT_Int32)
+    mem_ds.SetGeoTransform((tile.xoff, 1, 0, tile.yoff, 0, 1))
+    mem_ds.GetRasterBand(1).WriteArray(R)
+    mem_ds.GetRasterBand(2).WriteArray(valid)
+
+    ogr_ds = _memory_driver().CreateDataSource('')
+    layer = ogr_ds.CreateLayer('poligonos', geom_type=ogr.wkbPolygon)
+    layer.CreateField(ogr.FieldDefn('class', ogr.OFTInteger))
+    gdal.Polygonize(mem_ds.GetRasterBand(1), mem_ds.GetRasterBand(2), layer, 0, [])
+
+    x0, y0 = tile.xoff, tile.yoff
+    x1, y1 = x0 + tile.xsize, y0 + tile.ysize
+    polygons = []
+    for feature in layer:
+        geometry = feature.GetGeometryRef()
+        minx, maxx, miny, maxy = geometry.GetEnvelope()
+        seam = (
+            (minx == x0 and x0 > 0)
+            or (maxx == x1 and x1 < band.XSize)
+            or (miny == y0 and y0 > 0)
+            or (maxy == y1 and y1 < band.YSize))
+        polygons.append((feature.GetField(0), bytes(geometry.ExportToWkb()), seam))
+
+    return polygons
+
+
+def _polygonize_tile_worker(source, band_n, tile):
+    """Polygonize a tile in a worker process."""
+    return tile, polygonize_tile(_worker_band(source, band_n), tile)
+
+
+def _imap(source, band_n, tiles, workers):
+    """Yield (tile, polygons) for each tile, in completion order."""
+
+    if workers <= 1:
+        # Opened for this run only: the cache of _worker_band would keep
+        # the dataset, and its stale blocks, in the QGIS process
+        dataset = gdal.Open(source)
+        band = dataset.GetRasterBand(band_n)
+        try:
+            for tile in tiles:
+                yield tile, polygonize_tile(band, tile)
+        finally:
+            band = None
+            dataset = None
+        return
+
+    tiles = iter(tiles)
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=tile_pool.pool_context()) as executor:
+        pending = set()
+
+        def submit(n):
+            for tile in tiles:
+                pending.add(executor.submit(_polygonize_tile_worker, source, band_n, tile))
+                n -= 1
+                if n == 0:
+                    break
+
+        try:
+            submit(2 * workers)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+                submit(len(done))
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class _UnionFind:
+    """Disjoint sets of integers."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def _shares_edge(a, b):
+    return a.Intersection(b).GetDimension() == 1
+
+
+def _stitch_seam(side_a, side_b, axis, groups):
+    """Join the polygons of two tiles that share an edge along their seam.
+
+    side_a and side_b hold (index, class, geometry, envelope) of the
+    polygons of each tile on the seam; axis is the envelope position of
+    the range along the seam (2 for a vertical seam, 0 for a horizontal one).
+    """
+
+    side_b = sorted(side_b, key=lambda item: item[3][axis])
+    for i, cls, geometry, envelope in side_a:
+        lo, hi = envelope[axis], envelope[axis + 1]
+        for j, cls_b, geometry_b, envelope_b in side_b:
+            if envelope_b[axis] >= hi:
+                break
+            if cls_b != cls or envelope_b[axis + 1] <= lo:
+                continue
+            if _shares_edge(geometry, geometry_b):
+                groups.union(i, j)
+
+
+def polygonize(source, band_n, tile_size, workers=1, feedback=None):
+    """Yield (class, wkb) of the polygons of a raster band, in pixel coordinates.
+
+    The raster is polygonized by tiles, in a process pool with more
+    than one worker, with 4-connectivity as gdal:polygonize. Polygons
+    inside a tile are yielded as soon as it is done. The ones reaching
+    a seam are kept, and those sharing an edge across a seam are merged
+    once all tiles are done.
+    """
+
+    dataset = gdal.Open(source)
+    band = dataset.GetRasterBand(band_n)
+    tiles = list(raster_tiles.tiles(
+        band.XSize,
+        band.YSize,
+        tile_size,
+        band.GetBlockSize(),
+        0))
+    dataset = None
+
+    # Seam polygons: (index, class, geometry, envelope) by tile
+    seams = {}
+    count = 0
+    for n, (tile, polygons) in enumerate(_imap(source, band_n, tiles, workers)):
+        if feedback is not None:
+            if feedback.isCanceled():
+                return
+            feedback.setProgress(100 * (n + 1) / len(tiles))
+
+        on_seam = seams.setdefault((tile.xoff, tile.yoff), [])
+        for cls, wkb, seam in polygons:
+            if seam:
+                geometry = ogr.CreateGeometryFromWkb(wkb)
+                on_seam.append((count, cls, geometry, geometry.GetEnvelope()))
+                count += 1
+            else:
+                yield cls, wkb
+
+    # Join across the right and bottom seams of each tile
+    groups = _UnionFind()
+    for tile in tiles:
+        polygons = seams[(tile.xoff, tile.yoff)]
+        x1, y1 = tile.xoff + tile.xsize, tile.yoff + tile.ysize
+
+        right = seams.get((x1, tile.yoff))
+        if right:
+            _stitch_seam(
+                [p for p in polygons if p[3][1] == x1],
+                [p for p in right if p[3][0] == x1],
+                2,
+                groups)
+
+        below = seams.get((tile.xoff, y1))
+        if below:
+            _stitch_seam(
+                [p for p in polygons if p[3][3] == y1],
+                [p for p in below if p[3][2] == y1],
+                0,
+                groups)
+
+    members = {}
+    for polygons in seams.values():
+        for i, cls, geometry, _ in polygons:
+            members.setdefault(groups.find(i), []).append((cls, geometry))
+
+    for parts in members.values():
+        if feedback is not None and feedback.isCanceled():
+            return
+        cls = parts[0][0]
+        if len(parts) == 1:
+            yield cls, bytes(parts[0][1].ExportToWkb())
+            continue
+        multi = ogr.Geometry(ogr.wkbMultiPolygon)
+        for _, geometry in parts:
+            multi.AddGeometry(geometry)
+        union = multi.UnionCascaded()
+        if union.GetGeometryType() == ogr.wkbMultiPolygon:
+            for k in range(union.GetGeometryCount()):
+                yield cls, bytes(union.GetGeometryRef(k).ExportToWkb())
+        else:
+            yield cls, bytes(union.ExportToWkb())
@@ -13,31 +13,64 @@
 ************************************************************************
 """
 
+import os
+
 from qgis.core import (
     Qgis,
-    QgsFeatureRequest,
+    QgsFeature,
     QgsFeatureSink,
     QgsField,
     QgsFields,
+    QgsGeometry,
     QgsProcessing,
     QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingParameterBoolean,
     QgsProcessingParameterDefinition,
+    QgsProcessingParameterEnum,
     QgsProcessingParameterFeatureSink,
     QgsProcessingParameterField,
     QgsProcessingParameterNumber,
     QgsProcessingParameterRasterLayer,
+    QgsProcessingUtils,
+    QgsVectorLayer,
     QgsWkbTypes
 )
 from qgis.PyQt.QtCore import (
     QCoreApplication,
     QVariant
 )
+from qgis.PyQt.QtGui import QTransform
 import processing
 
+from osgeo import gdal
+
+from otbn.processing.algorithms.otbn_utils import (
+    components,
+    polygon_stream,
+    ring_pruning,
+    staircase,
+    tiled_polygonize
+)
+
 
 class Poligonizar(QgsProcessingAlgorithm):
     """Poligonizar algorithm class."""
 
+    # Engines to fill the holes of up to HOLESHA, (name, label)
+    ENGINES = [
+        ('union', 'Unión vectorial de holes (GUnion)'),
+        ('raster', 'Componentes conexas en el raster'),
+        ('rings', 'Poda de anillos interiores')
+    ]
+
+    # Simplification of the polygons, (name, label)
+    SIMPLIFIERS = [
+        ('polygon', 'Polígono por polígono (ST_Simplify)'),
+        ('coverage', 'Cobertura, con los vértices compartidos fijos'),
+        ('staircase', 'Suavizado de escalones y simplificación en paralelo')
+    ]
+
 
     def tr(self, string):
         """Return a localized string."""
@@ -106,6 +139,53 @@ class Poligonizar(QgsProcessingAlgorithm):
             minValue=0,
             defaultValue=4))
 
+        # ENGINE
+        param = QgsProcessingParameterEnum(
+                'ENGINE',
+                self.tr('Método de relleno de holes'),
+            options=[self.tr(label) for _, label in self.ENGINES],
+            defaultValue=0)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # HASIMPL
+        param = QgsProcessingParameterBoolean(
+                'HASIMPL',
+                self.tr('Agregar la superficie tras simplificar (campo ha_simpl)'),
+            defaultValue=False)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # SIMPLIFY
+        param = QgsProcessingParameterEnum(
+                'SIMPLIFY',
+                self.tr('Método de simplificación'),
+            options=[self.tr(label) for _, label in self.SIMPLIFIERS],
+            defaultValue=0)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # TILESIZE
+        param = QgsProcessingParameterNumber(
+                'TILESIZE',
+                self.tr('Tamaño de tesela en pixeles (0 = raster completo y gdal:polygonize)'),
+            QgsProcessingParameterNumber.Integer,
+            minValue=0,
+            defaultValue=0)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
+        # WORKERS
+        param = QgsProcessingParameterNumber(
+                'WORKERS',
+                self.tr('Procesos en paralelo'),
+            QgsProcessingParameterNumber.Integer,
+            minValue=1,
+            maxValue=os.cpu_count() or 1,
+            defaultValue=1)
+        param.setFlags(param.flags() | advanced_flag)
+        self.addParameter(param)
+
         # OUTPUT
         self.addParameter(
             QgsProcessingParameterFeatureSink(
@@ -155,45 +235,207 @@ class Poligonizar(QgsProcessingAlgorithm):
 
 
         #####
-        # Poligonizar raster
+        # ENGINE
         #####
-        alg_params = {
-            'BAND': 1,
-            'EIGHT_CONNECTEDNESS': False,
-            'EXTRA': '',
-            'FIELD': 'class',
-            'INPUT': parameters['INPUT'],
-            'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-        }
-        feedback.pushDebugInfo("Vectorizando capa raster ...")
-        outputs['POLYGONIZE'] = processing.run('gdal:polygonize',
-            alg_params,
-            context=context,
-            feedback=feedback,
-            is_child_algorithm=True)
+        engine = self.ENGINES[self.parameterAsEnum(
+            parameters,
+            'ENGINE',
+            context)][0]
+
+
+        #####
+        # HASIMPL
+        #####
+        hasimpl = self.parameterAsBool(
+            parameters,
+            'HASIMPL',
+            context)
+
+
+        #####
+        # SIMPLIFY
+        #####
+        simplifier = self.SIMPLIFIERS[self.parameterAsEnum(
+            parameters,
+            'SIMPLIFY',
+            context)][0]
+
+
+        #####
+        # TILESIZE
+        #####
+        tile_size = self.parameterAsInt(
+            parameters,
+            'TILESIZE',
+            context)
+
+
+        #####
+        # WORKERS
+        #####
+        workers = self.parameterAsInt(
+            parameters,
+            'WORKERS',
+            context)
+
+
+        #####
+        # Rellenar holes y filtrar componentes en el raster
+        #####
+        polygonize_input = input_raster.source()
+        pixel_counts = None
+        if engine == 'raster':
+            polygonize_input = QgsProcessingUtils.generateTempFilename('componentes.tif')
+            feedback.pushDebugInfo(f"Rellenando holes de hasta {holesha} hectareas en el raster ...")
+            pixel_counts = components.filter_raster(
+                input_raster.source(),
+                polygonize_input,
+                holesha,
+                poligha,
+                tile_size)
 
         if feedback.isCanceled():
             return {}
 
 
         #####
-        # Pormover poligonos a singlepart
+        # Poligonizar raster
         #####
-        alg_params = {
-            'INPUT': outputs['POLYGONIZE']['OUTPUT'],
-            'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-        }
-        feedback.pushDebugInfo("Convirtiendo multipartes a singlepart ...")
-        outputs['MULTI2SINGLE1'] = processing.run('native:multiparttosingleparts',
-            alg_params,
-            context=context,
-            feedback=feedback,
-            is_child_algorithm=True)
+        polygons = None
+        features = None
+        if tile_size > 0 and engine == 'raster':
+            # Los componentes del raster ya son los polígonos de clase 1,
+            #  que van directo a la simplificación sin capa intermedia
+            features = self._tile_features(
+                polygonize_input,
+                tile_size,
+                workers,
+                feedback)
+        elif tile_size > 0:
+            polygons = self._polygonize_tiles(
+                polygonize_input,
+                input_raster,
+                tile_size,
+                workers,
+                context,
+                feedback)
+        else:
+            polygons = self._polygonize(
+                polygonize_input,
+                context,
+                feedback)
+        if features is None and polygons is None:
+            return {}
 
-        if feedback.isCanceled():
+
+        #####
+        # Unir holes de hasta HolesHa hectareas
+        #####
+        # Los componentes del raster ya son los polígonos de clase 1,
+        #  con su etiqueta como valor
+        if engine == 'rings':
+            polygons = self._prune_rings(
+                polygons,
+                input_raster,
+                holesha,
+                context,
+                feedback)
+        elif engine == 'union':
+            polygons = self._union_holes(
+                polygons,
+                outputs,
+                input_raster,
+                holesha,
+                context,
+                feedback)
+        if features is None and polygons is None:
             return {}
 
 
+        # Campos para la salida
+        fields = QgsFields()
+        fields.append(QgsField('pol_id', QVariant.Int))
+        fields.append(QgsField('class', QVariant.Int))
+        fields.append(QgsField('ha', QVariant.Double))
+        if hasimpl:
+            fields.append(QgsField('ha_simpl', QVariant.Double))
+
+        # Definir el geometryType dependiendo la versión de QGIS:
+        if Qgis.QGIS_VERSION_INT < 33000:
+            geometryType = QgsWkbTypes.Polygon
+        else:
+            geometryType = Qgis.WkbType.Polygon
+
+        # Crear el sink a partir del parametro de salida
+        (sink, dest_id) = self.parameterAsSink(
+            parameters=parameters,
+            name='OUTPUT',
+            context=context,
+            fields=fields,
+            geometryType=geometryType,
+            crs=input_raster.crs())
+
+
+        #####
+        # Simplificar geometrias y extraer mayores que PoligHa
+        #####
+        feedback.pushDebugInfo(f"Simplificando geometrías y extrayendo polígonos de al menos {poligha} hectáreas ...")
+        if features is None:
+            features = context.getMapLayer(polygons).getFeatures()
+
+        # Sin conteos de pixeles, la superficie antes de simplificar,
+        #  que en poligonos de pixeles es exacta
+        source_area = pixel_counts is None
+        smoother = None
+        if simplifier == 'staircase':
+            smoother = staircase.Smoother(10, workers)
+            simplified = polygon_stream.wkb_geometries(
+                smoother.simplify(features, source_area))
+        elif simplifier == 'coverage':
+            simplified = polygon_stream.coverage_simplify_features(features, 10, source_area)
+        else:
+            simplified = polygon_stream.simplify_features(features, 10, source_area)
+
+        dataset = gdal.Open(input_raster.source())
+        pixel_ha = components.pixel_area(dataset.GetGeoTransform()) / (100 * 100)
+        dataset = None
+
+        pol_id = 0
+        for cls, area, geometry in simplified:
+            if feedback.isCanceled() or pol_id == 100000:
+                break
+            if pixel_counts is not None:
+                ha = float(pixel_counts[cls] * pixel_ha)
+                cls = 1
+            else:
+                ha = area / (100 * 100)
+            if ha < poligha:
+                continue
+            pol_id += 1
+            attributes = [pol_id, cls, ha]
+            if hasimpl:
+                attributes.append(geometry.area() / (100 * 100))
+            f = QgsFeature(fields)
+            f.setGeometry(geometry)
+            f.setAttributes(attributes)
+            sink.addFeature(f, QgsFeatureSink.FastInsert)
+        simplified.close()
+
+        if smoother is not None:
+            feedback.pushInfo(
+                f"Vértices: {smoother.vertices_before} antes y "
+                f"{smoother.vertices_after} después del suavizado.")
+
+        # Devolver el identificador del sink como salida
+        return {'OUTPUT': dest_id}
+
+
+    def _union_holes(self, polygons, outputs, input_raster, holesha, context, feedback):
+        """Union the class-1 polygons with the class-0 ones of up to holesha.
+
+        Returns the singlepart union, or None if canceled.
+        """
+
         #####
         # Unir holes de menos de HolesHa hectareas
         #####
@@ -223,7 +465,7 @@ class Poligonizar(QgsProcessingAlgorithm):
             """
         # Execute SQL
         alg_params = {
-            'INPUT_DATASOURCES': outputs['MULTI2SINGLE1']['OUTPUT'],
+            'INPUT_DATASOURCES': polygons,
             'INPUT_GEOMETRY_CRS': input_raster.crs(),
             'INPUT_GEOMETRY_FIELD': 'geometry',
             'INPUT_GEOMETRY_TYPE': 4, # Poligono
@@ -238,7 +480,7 @@ class Poligonizar(QgsProcessingAlgorithm):
             feedback=feedback,
             is_child_algorithm=True)
         if feedback.isCanceled():
-            return {}
+            return None
 
 
         #####
@@ -255,104 +497,120 @@ class Poligonizar(QgsProcessingAlgorithm):
             feedback=feedback,
             is_child_algorithm=True)
         if feedback.isCanceled():
-            return {}
+            return None
 
+        return outputs['MULTI2SINGLE2']['OUTPUT']
 
-        #####
-        # Simplificar geometrias y extraer mayores que PoligHa
-        #####
-        query = """WITH nombres AS
-        (
-            SELECT
-                class AS class,
-                geometry
-            FROM
-                input1
-        ),
-        simplificados AS (
-            SELECT
-                class,
-                ST_Simplify(geometry, 10) AS geometry
-            FROM
-                nombres
-        ),
-        areas AS (
-            SELECT
-                class,
-                ST_Area(geometry)/(100*100) AS ha,
-                geometry
-            FROM
-                simplificados
-        ),
-        filtrados AS (
-            SELECT *
-            FROM areas """
-        query += f'WHERE ha >= {poligha}'
-        query += """)
-        SELECT
-            ROW_NUMBER() OVER() AS pol_id,
-            class,
-            ha,
-            geometry
-        FROM
-            filtrados;
-            """
-        # Execute SQL
-        alg_params = {
-            'INPUT_DATASOURCES': outputs['MULTI2SINGLE2']['OUTPUT'],
-            'INPUT_GEOMETRY_CRS': input_raster.crs(),
-            'INPUT_GEOMETRY_FIELD': 'geometry',
-            'INPUT_GEOMETRY_TYPE': 4, # Poligono
-            'INPUT_QUERY': query,
-            'INPUT_UID_FIELD': '',
-            'OUTPUT': QgsProcessing.TEMPORARY_OUTPUT
-        }
-        feedback.pushDebugInfo(f"Simplificando geometrías y extrayendo polígonos de al menos {poligha} hectáreas ...")
-        outputs['SQL2'] = processing.run('qgis:executesql',
-            alg_params,
-            context=context,
-            feedback=feedback,
-            is_child_algorithm=True)
-        if feedback.isCanceled():
-            return {}
 
+    def _prune_rings(self, polygons, input_raster, holesha, context, feedback):
+        """Merge the class-0 holes of up to holesha into the class-1 polygons.
+
+        Returns the id of a temporary layer with the merged polygons, or
+        None if canceled.
+        """
 
-        # Obtener la capa de salida de SQL2 a partir de su id
-        #  dentro del context
-        vlyr = context.getMapLayer(outputs['SQL2']['OUTPUT'])
+        layer = context.getMapLayer(polygons)
+
+        feedback.pushDebugInfo(f"Podando holes de hasta {holesha} hectareas ...")
+        merged = ring_pruning.merge_holes(layer, holesha * 100 * 100, feedback)
+
+        return self._temporary_layer(
+            ((1, bytes(geometry.asWkb())) for geometry in merged),
+            input_raster.crs(),
+            'poda_anillos',
+            context,
+            feedback)
+
+
+    def _polygonize(self, source, context, feedback):
+        """Polygonize source in-process into a temporary GeoPackage.
+
+        Returns the id of the layer, with the class field as the output
+        of gdal:polygonize, or None if canceled.
+        """
+
+        output_file = QgsProcessingUtils.generateTempFilename('poligonos.gpkg')
+
+        feedback.pushDebugInfo("Vectorizando capa raster ...")
+        if not polygon_stream.polygonize(source, output_file, feedback):
+            if feedback.isCanceled():
+                return None
+            raise QgsProcessingException(
+                self.tr('Error al vectorizar la capa raster: {}').format(gdal.GetLastErrorMsg()))
+
+        return self._gpkg_layer(output_file, 'poligonizado', context)
+
+
+    def _tile_polygons(self, source, tile_size, workers, feedback):
+        """Yield (class, geometry) of source polygonized by tiles.
+
+        Tiles are polygonized in a process pool with several workers,
+        and the polygons moved from pixel to map coordinates.
+        """
+
+        dataset = gdal.Open(source)
+        gt = dataset.GetGeoTransform()
+        dataset = None
+
+        # Tiles are polygonized in pixel coordinates
+        transform = QTransform(gt[1], gt[4], gt[2], gt[5], gt[0], gt[3])
+
+        feedback.pushDebugInfo(f"Vectorizando capa raster por teselas en {workers} proceso(s) ...")
+        for cls, wkb in tiled_polygonize.polygonize(source, 1, tile_size, workers, feedback):
+            geometry = QgsGeometry()
+            geometry.fromWkb(wkb)
+            geometry.transform(transform)
+            yield cls, geometry
+
+
+    def _tile_features(self, source, tile_size, workers, feedback):
+        """Yield the polygons of source, polygonized by tiles, as features with a class field."""
 
-        # Campos para la salida
         fields = QgsFields()
-        fields.append(QgsField('pol_id', QVariant.Int))
         fields.append(QgsField('class', QVariant.Int))
-        fields.append(QgsField('ha', QVariant.Double))
 
-        # Definir el geometryType dependiendo la versión de QGIS:
-        if Qgis.QGIS_VERSION_INT < 33000:
-            geometryType = QgsWkbTypes.Polygon
-        else:
-            geometryType = Qgis.WkbType.Polygon
+        for cls, geometry in self._tile_polygons(source, tile_size, workers, feedback):
+            feature = QgsFeature(fields)
+            feature.setGeometry(geometry)
+            feature.setAttributes([cls])
+            yield feature
 
-        # Crear el sink a partir del parametro de salida
-        (sink, dest_id) = self.parameterAsSink(
-            parameters=parameters,
-            name='OUTPUT',
-            context=context,
-            fields=fields,
-            geometryType=geometryType,
-            crs=input_raster.crs())
 
-        # Transferir los objetos de la vector layer al sink
-        feat_request = QgsFeatureRequest()
+    def _polygonize_tiles(self, source, input_raster, tile_size, workers, context, feedback):
+        """Polygonize source by tiles into a temporary GeoPackage.
 
-        if vlyr.featureCount() > 100000:
-            feat_request.setLimit(100000)
+        Returns the id of the layer, with the class field as the output
+        of gdal:polygonize, or None if canceled.
+        """
 
-        feedback.pushDebugInfo("Creando capa de salida ...")
-        for f in vlyr.getFeatures(feat_request):
-            if feedback.isCanceled():
-                break
-            sink.addFeature(f, QgsFeatureSink.FastInsert)
+        polygons = self._tile_polygons(source, tile_size, workers, feedback)
+        return self._temporary_layer(
+            ((cls, bytes(geometry.asWkb())) for cls, geometry in polygons),
+            input_raster.crs(),
+            'poligonizado',
+            context,
+            feedback)
 
-        # Devolver el identificador del sink como salida
-        return {'OUTPUT': dest_id}
+
+    def _temporary_layer(self, polygons, crs, name, context, feedback):
+        """Write (class, wkb) pairs to a temporary GeoPackage.
+
+        Returns the id of the layer in the context, or None if canceled.
+        """
+
+        output_file = QgsProcessingUtils.generateTempFilename(f'{name}.gpkg')
+        if not polygon_stream.write_polygons(polygons, output_file, crs.toWkt(), feedback):
+            return None
+
+        return self._gpkg_layer(output_file, name, context)
+
+
+    def _gpkg_layer(self, output_file, name, context):
+        """Load the polygon_stream layer of output_file into the context; return its id."""
+
+        layer = QgsVectorLayer(
+            f'{output_file}|layername={polygon_stream.LAYER_NAME}',
+            name,
+            'ogr')
+        context.temporaryLayerStore().addMapLayer(layer)
+        return layer.id()
@@ -18,6 +18,8 @@ from qgis.core import QgsProcessingProvider
 
 from otbn.processing.algorithms import (
     filtroraster_algorithm,
+    filtrorasterbarrido_algorithm,
+    filtrorasterlote_algorithm,
     poligonizar_algorithm,
     redondear_algorithm,
     desagrupar_algorithm,
@@ -36,6 +38,8 @@ class OtbnProvider(QgsProcessingProvider):
     def loadAlgorithms(self, *args, **kwargs):
         """Load the algorithms of the provider."""
         self.addAlgorithm(filtroraster_algorithm.FiltroRaster())
+        self.addAlgorithm(filtrorasterbarrido_algorithm.FiltroRasterBarrido())
+        self.addAlgorithm(filtrorasterlote_algorithm.FiltroRasterLote())
         self.addAlgorithm(poligonizar_algorithm.Poligonizar())
         self.addAlgorithm(redondear_algorithm.Redondear())
         self.addAlgorithm(desagrupar_algorithm.Desagrupar())